@@ -8,7 +8,9 @@ from utils.stock_data import StockDataFetcher
 from utils.chart_utils import create_price_chart, create_volume_chart, detect_golden_death_cross, create_cross_analysis_chart
 from utils.stock_database import search_stocks, get_popular_stocks, get_all_sectors, get_stocks_by_sector
 from utils.watchlist_pages import render_watchlist_navigation
-from utils.nse500_analyzer import analyze_nse500_crosses, filter_results, get_rsi_education, calculate_rsi, detect_divergence
+from utils.report_snapshots import get_report_scheduler
+from utils.security_master import get_security_master
+from utils.nse500_analyzer import apply_fundamentals, filter_results, get_rsi_education, IndicatorContext
 import io
 
 # Page configuration
@@ -239,9 +241,91 @@ def get_data_fetcher():
 
 data_fetcher = get_data_fetcher()
 
+# Start the report scheduler with the app, so a snapshot is built before anyone opens the report
+report_scheduler = get_report_scheduler()
+
 if 'stock_fetcher' not in st.session_state:
     st.session_state.stock_fetcher = data_fetcher
 
+def render_market_report(market_data, cross_filter, recommendation_filter, sector_filter, live=False):
+    """Summary metrics and table for a market report; `live` marks the partial rows of a running scan"""
+    filtered_data = filter_results(market_data, cross_filter if cross_filter != "All" else None, 
+                                  recommendation_filter if recommendation_filter != "All" else None,
+                                  sector_filter if sector_filter != "All" else None)
+    
+    st.markdown(f"### Found {len(filtered_data)} stocks with recent crosses")
+    
+    # Summary metrics
+    gold_count = len(market_data[market_data['Cross Type'] == 'Golden Cross'])
+    death_count = len(market_data[market_data['Cross Type'] == 'Death Cross'])
+    buy_count = len(market_data[market_data['Recommendation'] == 'BUY'])
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🟢 Golden Crosses", gold_count)
+    with col2:
+        st.metric("🔴 Death Crosses", death_count)
+    with col3:
+        st.metric("💰 Buy Signals", buy_count)
+    with col4:
+        st.metric("📊 Total Signals", len(market_data))
+    
+    st.markdown("---")
+    
+    # Display table
+    display_cols = ['Symbol', 'Company Name', 'Cross Type', 'Cross Date', 'Price at Cross', 
+                   'Current Price', 'Price Change %', 'RSI', 'P/E Ratio', 'ROI %', 'Divergence', 'Recommendation', 'Reason']
+    
+    st.dataframe(
+        filtered_data[display_cols],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Symbol': st.column_config.TextColumn('📍 Symbol'),
+            'Company Name': st.column_config.TextColumn('🏢 Company'),
+            'Cross Type': st.column_config.TextColumn('🔄 Cross Type'),
+            'Cross Date': st.column_config.DateColumn('📅 Date', format="YYYY-MM-DD"),
+            'Price at Cross': st.column_config.NumberColumn('💰 Price @ Cross', format="₹%.2f"),
+            'Current Price': st.column_config.NumberColumn('📈 Current Price', format="₹%.2f"),
+            'Price Change %': st.column_config.NumberColumn('📊 % Change', format="%+.2f%%"),
+            'RSI': st.column_config.NumberColumn('RSI', format="%.2f"),
+            'P/E Ratio': st.column_config.NumberColumn('P/E', format="%.2f"),
+            'ROI %': st.column_config.NumberColumn('ROI', format="%.2f%%"),
+            'Divergence': st.column_config.TextColumn('🔀 Divergence'),
+            'Recommendation': st.column_config.TextColumn('⭐ Recommendation'),
+            'Reason': st.column_config.TextColumn('💡 Reason')
+        }
+    )
+    
+    if live:
+        return
+    
+    # Download button
+    csv_data = filtered_data[display_cols].to_csv(index=False, float_format="%.2f", date_format="%Y-%m-%d")
+    st.download_button(
+        label="💾 Download Report as CSV",
+        data=csv_data,
+        file_name=f"NSE500_Market_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+@st.fragment(run_every=2)
+def render_live_scan(scheduler, cross_filter, recommendation_filter, sector_filter):
+    """Rows of the running background scan, re-rendered as they arrive until the scan finishes"""
+    if not scheduler.busy:
+        # The new snapshot is on disk: rerun the whole page to show it
+        st.rerun()
+    
+    done, total = scheduler.progress
+    st.progress(done / total if total else 0.0, text=f"📊 Scanning NSE 500 stocks... {done}/{total} analyzed")
+    
+    partial_data = apply_fundamentals(scheduler.partial_report())
+    if partial_data is not None and not partial_data.empty:
+        render_market_report(partial_data, cross_filter, recommendation_filter, sector_filter, live=True)
+    else:
+        st.info("Looking for Golden/Death crosses...")
+
 # Check if we should render market report
 if st.session_state.get('page_mode') == 'market_report':
     # Add back to main button in sidebar
@@ -253,15 +337,18 @@ if st.session_state.get('page_mode') == 'market_report':
     st.markdown('<h1 class="main-header">📊 NSE 500 Market Report</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Golden Cross & Death Cross Analysis - Past 7 Days</p>', unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
+    # Reports are built by the background scheduler; this page only reads the latest snapshot
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         cross_filter = st.selectbox("Filter by Cross Type:", ["All", "Golden Cross", "Death Cross"])
     with col2:
         recommendation_filter = st.selectbox("Filter by Recommendation:", ["All", "BUY", "HOLD", "SELL"])
     with col3:
+        sector_filter = st.selectbox("Filter by Sector:", ["All"] + get_all_sectors())
+    with col4:
         if st.button("🔄 Refresh Analysis", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
+            report_scheduler.run_now()
+            st.session_state.watch_rescan = True
     
     st.markdown("---")
     
@@ -291,68 +378,32 @@ if st.session_state.get('page_mode') == 'market_report':
     
     st.markdown("---")
     
-    with st.spinner("📊 Analyzing NSE 500 stocks for Golden/Death crosses..."):
-        market_data = analyze_nse500_crosses()
+    market_data, snapshot_time = report_scheduler.store.load_latest()
+    market_data = apply_fundamentals(market_data)
     
-    if market_data is not None and not market_data.empty:
-        filtered_data = filter_results(market_data, cross_filter if cross_filter != "All" else None, 
-                                      recommendation_filter if recommendation_filter != "All" else None)
-        
-        st.markdown(f"### Found {len(filtered_data)} stocks with recent crosses")
-        
-        # Summary metrics
-        gold_count = len(market_data[market_data['Cross Type'] == 'Golden Cross'])
-        death_count = len(market_data[market_data['Cross Type'] == 'Death Cross'])
-        buy_count = len(market_data[market_data['Recommendation'] == 'BUY'])
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("🟢 Golden Crosses", gold_count)
-        with col2:
-            st.metric("🔴 Death Crosses", death_count)
-        with col3:
-            st.metric("💰 Buy Signals", buy_count)
-        with col4:
-            st.metric("📊 Total Signals", len(market_data))
-        
-        st.markdown("---")
+    if report_scheduler.busy and (snapshot_time is None or st.session_state.get('watch_rescan')):
+        # Show rows as the background scan finds them
+        render_live_scan(report_scheduler, cross_filter, recommendation_filter, sector_filter)
+    else:
+        st.session_state.watch_rescan = False
         
-        # Display table
-        display_cols = ['Symbol', 'Company Name', 'Cross Type', 'Cross Date', 'Price at Cross', 
-                       'Current Price', 'Price Change %', 'RSI', 'P/E Ratio', 'ROI %', 'Divergence', 'Recommendation', 'Reason']
+        if snapshot_time is not None:
+            status = " · rescan in progress" if report_scheduler.busy else ""
+            st.caption(f"Report generated {snapshot_time.strftime('%d %b %Y %H:%M')} IST · "
+                       f"next scheduled run {report_scheduler.next_run().strftime('%d %b %H:%M')} IST{status}")
+            if report_scheduler.last_error and not report_scheduler.busy:
+                st.warning(f"⚠️ The latest rescan failed ({report_scheduler.last_error}); showing the previous report.")
         
-        st.dataframe(
-            filtered_data[display_cols],
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                'Symbol': st.column_config.TextColumn('📍 Symbol'),
-                'Company Name': st.column_config.TextColumn('🏢 Company'),
-                'Cross Type': st.column_config.TextColumn('🔄 Cross Type'),
-                'Cross Date': st.column_config.TextColumn('📅 Date'),
-                'Price at Cross': st.column_config.TextColumn('💰 Price @ Cross'),
-                'Current Price': st.column_config.TextColumn('📈 Current Price'),
-                'Price Change %': st.column_config.TextColumn('📊 % Change'),
-                'RSI': st.column_config.TextColumn('RSI'),
-                'P/E Ratio': st.column_config.TextColumn('P/E'),
-                'ROI %': st.column_config.TextColumn('ROI'),
-                'Divergence': st.column_config.TextColumn('🔀 Divergence'),
-                'Recommendation': st.column_config.TextColumn('⭐ Recommendation'),
-                'Reason': st.column_config.TextColumn('💡 Reason')
-            }
-        )
-        
-        # Download button
-        csv_data = filtered_data[display_cols].to_csv(index=False)
-        st.download_button(
-            label="💾 Download Report as CSV",
-            data=csv_data,
-            file_name=f"NSE500_Market_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-    else:
-        st.warning("⚠️ No stocks with recent crosses found. Analyzing...")
+        if snapshot_time is None:
+            if report_scheduler.last_error:
+                st.error(f"❌ The market report could not be built: {report_scheduler.last_error}. "
+                         "It is retried automatically, or click Refresh Analysis to retry now.")
+            else:
+                st.info("⏳ No market report yet. The first NSE 500 scan is starting...")
+        elif market_data is not None and not market_data.empty:
+            render_market_report(market_data, cross_filter, recommendation_filter, sector_filter)
+        else:
+            st.warning("⚠️ No stocks with recent crosses found in the latest report.")
     
     st.stop()
 
@@ -479,6 +530,14 @@ with st.sidebar:
     st.session_state.selected_period_label = selected_period
     st.session_state.selected_period = period
     
+    # Switching periods re-slices the loaded stock from the local store (no download)
+    if (st.session_state.stock_data is not None and st.session_state.selected_symbol
+            and st.session_state.get('loaded_period') != period):
+        period_data = data_fetcher.fetch_stock_data(st.session_state.selected_symbol, period)
+        if period_data is not None:
+            st.session_state.stock_data = period_data
+            st.session_state.loaded_period = period
+    
     # Enhanced analyze button
     st.markdown("---")
     
@@ -517,6 +576,7 @@ with st.sidebar:
                     if stock_data is not None:
                         st.session_state.stock_data = stock_data
                         st.session_state.selected_symbol = symbol_to_analyze
+                        st.session_state.loaded_period = period
                         st.success(f"✅ Analysis ready for {symbol_to_analyze}")
                         st.balloons()  # Celebratory animation
                     else:
@@ -569,6 +629,7 @@ with st.sidebar:
                             if stock_data is not None:
                                 st.session_state.stock_data = stock_data
                                 st.session_state.selected_symbol = full_symbol
+                                st.session_state.loaded_period = period
                                 st.rerun()
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
@@ -592,6 +653,7 @@ with st.sidebar:
                             if stock_data is not None:
                                 st.session_state.stock_data = stock_data
                                 st.session_state.selected_symbol = full_symbol
+                                st.session_state.loaded_period = period
                                 st.rerun()
                         except Exception as e:
                             st.error(f"Error: {str(e)}")
@@ -616,12 +678,21 @@ if st.session_state.stock_data is not None:
     
     # Get stock info from database for better display
     symbol_clean = symbol.replace('.NS', '').replace('.BO', '')
-    stock_info = None
     
-    # Try to get additional info from our database
-    from utils.stock_database import INDIAN_STOCKS
-    if symbol_clean in INDIAN_STOCKS:
-        stock_info = INDIAN_STOCKS[symbol_clean]
+    # Try to get additional info from the security master
+    stock_info = get_security_master().get(symbol_clean)
+    
+    # Fundamentals from the local daily snapshot (refreshed in the background)
+    fundamentals = data_fetcher.get_stock_info(symbol)
+    fundamentals_parts = []
+    if isinstance(fundamentals.get('pe_ratio'), (int, float)):
+        fundamentals_parts.append(f"<strong>P/E:</strong> {fundamentals['pe_ratio']:.2f}")
+    if isinstance(fundamentals.get('market_cap'), (int, float)):
+        fundamentals_parts.append(f"<strong>Market Cap:</strong> ₹{fundamentals['market_cap'] / 1e7:,.0f} Cr")
+    if isinstance(fundamentals.get('beta'), (int, float)):
+        fundamentals_parts.append(f"<strong>Beta:</strong> {fundamentals['beta']:.2f}")
+    if isinstance(fundamentals.get('dividend_yield'), (int, float)):
+        fundamentals_parts.append(f"<strong>Dividend Yield:</strong> {fundamentals['dividend_yield']:.2f}%")
     
     # Modern stock header with company info
     st.markdown(f"""
@@ -630,6 +701,7 @@ if st.session_state.stock_data is not None:
             {symbol} {f"- {stock_info['name']}" if stock_info else ""}
         </h2>
         {f'<p style="color: #8B949E; margin-bottom: 1rem;"><strong>Sector:</strong> {stock_info["sector"]} | <strong>Exchange:</strong> {stock_info["exchange"]}</p>' if stock_info else ''}
+        {f'<p style="color: #8B949E; margin-bottom: 1rem;">{" | ".join(fundamentals_parts)}</p>' if fundamentals_parts else ''}
     </div>
     """, unsafe_allow_html=True)
     
@@ -649,11 +721,14 @@ if st.session_state.stock_data is not None:
     period_return = ((current_price / stock_data['Close'].iloc[0]) - 1) * 100
     volatility = stock_data['Close'].pct_change().std() * 100
     
+    # RSI is computed once and shared by the metrics, divergence and data table below
+    indicators = IndicatorContext(stock_data)
+    
     # Calculate RSI
-    rsi_value = calculate_rsi(stock_data)
+    rsi_value = indicators.rsi
     
     # Detect divergence
-    divergence_signal = detect_divergence(stock_data)
+    divergence_signal = indicators.divergence
     
     # Get period label for display
     period_label = st.session_state.get('selected_period_label', '52W')
@@ -936,26 +1011,20 @@ if st.session_state.stock_data is not None:
     display_data['Daily Change (₹)'] = display_data['Close'] - display_data['Open']
     display_data['Daily Change (%)'] = ((display_data['Close'] - display_data['Open']) / display_data['Open'] * 100).round(2)
     
-    # Calculate RSI for each row
-    rsi_values = []
-    for i in range(len(stock_data)):
-        if i < 14:  # Need at least 14 periods for RSI
-            rsi_values.append(None)
-        else:
-            data_slice = stock_data.iloc[:i+1]
-            rsi = calculate_rsi(data_slice, period=14)
-            rsi_values.append(f"{rsi:.2f}" if rsi else "N/A")
+    # Calculate RSI for each row (whole series in one pass)
+    rsi_series = indicators.rsi_series.to_numpy()
+    rsi_values = [
+        None if i < 14 else (f"{rsi:.2f}" if rsi else "N/A")  # Need at least 14 periods for RSI
+        for i, rsi in enumerate(rsi_series)
+    ]
     display_data['RSI (14)'] = rsi_values
     
-    # Calculate Divergence Signals for each row
-    divergence_values = []
-    for i in range(len(stock_data)):
-        if i < 50:  # Need at least 50 periods for divergence detection
-            divergence_values.append(None)
-        else:
-            data_slice = stock_data.iloc[:i+1]
-            divergence = detect_divergence(data_slice)
-            divergence_values.append(divergence if divergence else "—")
+    # Calculate Divergence Signals for each row (whole series in one pass)
+    divergence_series = indicators.divergence_series.to_numpy()
+    divergence_values = [
+        None if i < 50 else (divergence if divergence else "—")  # Need at least 50 periods for divergence detection
+        for i, divergence in enumerate(divergence_series)
+    ]
     display_data['Divergence Signal'] = divergence_values
     
     # Round numeric columns
@@ -1120,6 +1189,7 @@ else:
                                 if stock_data is not None:
                                     st.session_state.stock_data = stock_data
                                     st.session_state.selected_symbol = stock['full_symbol']
+                                    st.session_state.loaded_period = "1y"
                                     st.rerun()
                             except Exception as e:
                                 st.error(f"Error loading {stock['symbol']}: {str(e)}")
@@ -21,33 +21,32 @@ class ExcelAnalyzer:
     def analyze_file(self) -> Dict[str, Any]:
         """Analyze the Excel file and return comprehensive structure information"""
         try:
-            # Read all sheets from the Excel file
-            excel_file = pd.ExcelFile(self.file_path)
-            
-            analysis = {
-                'file_name': self.file_path.split('/')[-1],
-                'sheet_names': excel_file.sheet_names,
-                'sheets_info': {},
-                'suggested_pages': [],
-                'stock_symbols': set(),
-                'data_types': {}
-            }
-            
-            # Analyze each sheet
-            for sheet_name in excel_file.sheet_names:
-                try:
-                    df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                    sheet_info = self._analyze_sheet(df, sheet_name)
-                    analysis['sheets_info'][sheet_name] = sheet_info
-                    self.sheets_data[sheet_name] = df
-                    
-                    # Extract stock symbols
-                    symbols = self._extract_stock_symbols(df)
-                    analysis['stock_symbols'].update(symbols)
-                    
-                except Exception as e:
-                    logger.warning(f"Could not read sheet '{sheet_name}': {str(e)}")
-                    analysis['sheets_info'][sheet_name] = {'error': str(e)}
+            # Open the workbook once; every sheet is parsed from this handle instead of re-reading the file
+            with pd.ExcelFile(self.file_path) as excel_file:
+                analysis = {
+                    'file_name': self.file_path.split('/')[-1],
+                    'sheet_names': excel_file.sheet_names,
+                    'sheets_info': {},
+                    'suggested_pages': [],
+                    'stock_symbols': set(),
+                    'data_types': {}
+                }
+                
+                # Analyze each sheet
+                for sheet_name in excel_file.sheet_names:
+                    try:
+                        df = excel_file.parse(sheet_name)
+                        sheet_info = self._analyze_sheet(df, sheet_name)
+                        analysis['sheets_info'][sheet_name] = sheet_info
+                        self.sheets_data[sheet_name] = df
+                        
+                        # Extract stock symbols
+                        symbols = self._extract_stock_symbols(df)
+                        analysis['stock_symbols'].update(symbols)
+                        
+                    except Exception as e:
+                        logger.warning(f"Could not read sheet '{sheet_name}': {str(e)}")
+                        analysis['sheets_info'][sheet_name] = {'error': str(e)}
             
             # Generate page suggestions based on analysis
             analysis['suggested_pages'] = self._generate_page_suggestions(analysis)
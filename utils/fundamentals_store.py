@@ -0,0 +1,164 @@
+"""
+Fundamentals snapshot store for StockScope
+Keeps a daily snapshot of slow-changing ticker.info fields on disk and refreshes it in the background
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import yfinance as yf
+
+from utils.ohlcv_store import DATA_DIR
+from utils.shared import process_singleton, write_json
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a snapshot is considered stale and refetched
+FUNDAMENTALS_TTL = 24 * 3600
+
+# Seconds a symbol whose ticker.info request failed waits before it is tried again
+FAILED_RETRY_TTL = 15 * 60
+
+# Concurrent ticker.info requests during a background refresh
+REFRESH_MAX_WORKERS = 8
+
+# ticker.info keys kept in a snapshot (same names as StockDataFetcher.get_stock_info)
+SNAPSHOT_FIELDS = {
+    'name': 'longName',
+    'sector': 'sector',
+    'industry': 'industry',
+    'market_cap': 'marketCap',
+    'pe_ratio': 'trailingPE',
+    'dividend_yield': 'dividendYield',
+    'beta': 'beta',
+    'currency': 'currency',
+}
+
+
+class FundamentalsStore:
+    """Daily snapshots of company fundamentals keyed by Yahoo Finance symbol.
+
+    Reads never touch the network: they return whatever snapshot is stored
+    (possibly stale, or None). Missing and stale symbols are fetched by
+    refresh(), normally started with refresh_in_background() so that no
+    ticker.info call happens while a page is rendering.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = FUNDAMENTALS_TTL):
+        self.path = path or os.path.join(DATA_DIR, 'fundamentals.json')
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._snapshots: Dict[str, Dict] = {}
+        # Symbol -> time of the last failed fetch, so pages do not retry it on every rerun
+        self._failed: Dict[str, float] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                self._snapshots = json.load(f)
+        except (OSError, ValueError):
+            self._snapshots = {}
+
+    def _save(self) -> None:
+        try:
+            write_json(self.path, self._snapshots)
+        except OSError as e:
+            logger.warning(f"Could not write fundamentals snapshot: {str(e)}")
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Stored snapshot for a symbol (may be stale), or None"""
+        return self._snapshots.get(symbol)
+
+    def get_many(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """Stored snapshots for the symbols that have one"""
+        return {symbol: self._snapshots[symbol] for symbol in symbols if symbol in self._snapshots}
+
+    def stale_symbols(self, symbols: Iterable[str]) -> List[str]:
+        """Symbols with no snapshot or one older than the TTL (recent failures excepted)"""
+        now = time.time()
+        return [
+            symbol for symbol in dict.fromkeys(symbols)
+            if (symbol not in self._snapshots or now - self._snapshots[symbol].get('updated_at', 0) > self.ttl)
+            and now - self._failed.get(symbol, 0) > FAILED_RETRY_TTL
+        ]
+
+    def refresh(self, symbols: Iterable[str], max_workers: int = REFRESH_MAX_WORKERS) -> int:
+        """
+        Fetch snapshots for the missing or stale symbols.
+
+        Returns:
+            int: Number of snapshots updated
+        """
+        stale = self.stale_symbols(symbols)
+        if not stale:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            snapshots = dict(zip(stale, executor.map(_fetch_snapshot, stale)))
+
+        updated = {symbol: snapshot for symbol, snapshot in snapshots.items() if snapshot is not None}
+        failed_at = time.time()
+        with self._lock:
+            for symbol, snapshot in snapshots.items():
+                if snapshot is None:
+                    self._failed[symbol] = failed_at
+                else:
+                    self._failed.pop(symbol, None)
+            if updated:
+                self._snapshots.update(updated)
+                self._save()
+
+        return len(updated)
+
+    def refresh_in_background(self, symbols: Iterable[str]) -> bool:
+        """
+        Start refresh() on a daemon thread unless one is already running.
+
+        Returns:
+            bool: True if a refresh was started
+        """
+        symbols = list(symbols)
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            if not self.stale_symbols(symbols):
+                return False
+
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_quietly, args=(symbols,), name="fundamentals-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+            return True
+
+    def _refresh_quietly(self, symbols: List[str]) -> None:
+        try:
+            count = self.refresh(symbols)
+            logger.info(f"Refreshed fundamentals for {count} symbols")
+        except Exception as e:
+            logger.error(f"Fundamentals refresh failed: {str(e)}")
+
+
+def _fetch_snapshot(symbol: str) -> Optional[Dict]:
+    """Fetch one snapshot from ticker.info (the slow call this store exists to avoid)"""
+    try:
+        info = yf.Ticker(symbol).info
+    except Exception as e:
+        logger.warning(f"Could not fetch fundamentals for {symbol}: {str(e)}")
+        return None
+
+    snapshot = {field: info.get(key) for field, key in SNAPSHOT_FIELDS.items()}
+    snapshot['updated_at'] = time.time()
+    return snapshot
+
+
+@process_singleton
+def get_fundamentals_store() -> FundamentalsStore:
+    """Get the process-wide fundamentals store instance"""
+    return FundamentalsStore()
@@ -1,112 +1,14 @@
-import yfinance as yf
 import pandas as pd
-import streamlit as st
 from datetime import datetime, timedelta
 import numpy as np
+from utils.ohlcv_store import get_ohlcv_store
+from utils.fundamentals_store import get_fundamentals_store
+from utils.scan_state import SymbolScanState, get_scan_state_store
+from utils.security_master import get_security_master
+from utils.stock_database import get_sector_index
 
-NSE500_STOCKS = [
-    "360ONE.NS", "3MINDIA.NS", "ABB.NS", "ACC.NS", "ACMESOLAR.NS",
-    "AIAENG.NS", "APLAPOLLO.NS", "AUBANK.NS", "AWL.NS", "AADHARHFC.NS",
-    "AARTIIND.NS", "AAVAS.NS", "ABBOTINDIA.NS", "ACE.NS", "ADANIENSOL.NS",
-    "ADANIENT.NS", "ADANIGREEN.NS", "ADANIPORTS.NS", "ADANIPOWER.NS", "ATGL.NS",
-    "ABCAPITAL.NS", "ABFRL.NS", "ABLBL.NS", "ABREL.NS", "ABSLAMC.NS",
-    "AEGISLOG.NS", "AEGISVOPAK.NS", "AFCONS.NS", "AFFLE.NS", "AJANTPHARM.NS",
-    "AKUMS.NS", "AKZOINDIA.NS", "APLLTD.NS", "ALKEM.NS", "ALKYLAMINE.NS",
-    "ALOKINDS.NS", "ARE&M.NS", "AMBER.NS", "AMBUJACEM.NS", "ANANDRATHI.NS",
-    "ANANTRAJ.NS", "ANGELONE.NS", "APARINDS.NS", "APOLLOHOSP.NS", "APOLLOTYRE.NS",
-    "APTUS.NS", "ASAHIINDIA.NS", "ASHOKLEY.NS", "ASIANPAINT.NS", "ASTERDM.NS",
-    "ASTRAZEN.NS", "ASTRAL.NS", "ATHERENERG.NS", "ATUL.NS", "AUROPHARMA.NS",
-    "AIIL.NS", "DMART.NS", "AXISBANK.NS", "BASF.NS", "BEML.NS",
-    "BLS.NS", "BSE.NS", "BAJAJ-AUTO.NS", "BAJFINANCE.NS", "BAJAJFINSV.NS",
-    "BAJAJHLDNG.NS", "BAJAJHFL.NS", "BALKRISIND.NS", "BALRAMCHIN.NS", "BANDHANBNK.NS",
-    "BANKBARODA.NS", "BANKINDIA.NS", "MAHABANK.NS", "BATAINDIA.NS", "BAYERCROP.NS",
-    "BERGEPAINT.NS", "BDL.NS", "BEL.NS", "BHARATFORG.NS", "BHEL.NS",
-    "BPCL.NS", "BHARTIARTL.NS", "BHARTIHEXA.NS", "BIKAJI.NS", "BIOCON.NS",
-    "BSOFT.NS", "BLUEDART.NS", "BLUEJET.NS", "BLUESTARCO.NS", "BBTC.NS",
-    "BOSCHLTD.NS", "FIRSTCRY.NS", "BRIGADE.NS", "BRITANNIA.NS", "MAPMYINDIA.NS",
-    "CCL.NS", "CESC.NS", "CGPOWER.NS", "CRISIL.NS", "CAMPUS.NS",
-    "CANFINHOME.NS", "CANBK.NS", "CAPLIPOINT.NS", "CGCL.NS", "CARBORUNIV.NS",
-    "CASTROLIND.NS", "CEATLTD.NS", "CENTRALBK.NS", "CDSL.NS", "CENTURYPLY.NS",
-    "CERA.NS", "CHALET.NS", "CHAMBLFERT.NS", "CHENNPETRO.NS", "CHOICEIN.NS",
-    "CHOLAHLDNG.NS", "CHOLAFIN.NS", "CIPLA.NS", "CUB.NS", "CLEAN.NS",
-    "COALINDIA.NS", "COCHINSHIP.NS", "COFORGE.NS", "COHANCE.NS", "COLPAL.NS",
-    "CAMS.NS", "CONCORDBIO.NS", "CONCOR.NS", "COROMANDEL.NS", "CRAFTSMAN.NS",
-    "CREDITACC.NS", "CROMPTON.NS", "CUMMINSIND.NS", "CYIENT.NS", "DCMSHRIRAM.NS",
-    "DLF.NS", "DOMS.NS", "DABUR.NS", "DALBHARAT.NS", "DATAPATTNS.NS",
-    "DEEPAKFERT.NS", "DEEPAKNTR.NS", "DELHIVERY.NS", "DEVYANI.NS", "DIVISLAB.NS",
-    "DIXON.NS", "AGARWALEYE.NS", "LALPATHLAB.NS", "DRREDDY.NS", "DUMMYHDLVR.NS",
-    "EIDPARRY.NS", "EIHOTEL.NS", "EICHERMOT.NS", "ELECON.NS", "ELGIEQUIP.NS",
-    "EMAMILTD.NS", "EMCURE.NS", "ENDURANCE.NS", "ENGINERSIN.NS", "ERIS.NS",
-    "ESCORTS.NS", "ETERNAL.NS", "EXIDEIND.NS", "NYKAA.NS", "FEDERALBNK.NS",
-    "FACT.NS", "FINCABLES.NS", "FINPIPE.NS", "FSL.NS", "FIVESTAR.NS",
-    "FORCEMOT.NS", "FORTIS.NS", "GAIL.NS", "GVT&D.NS", "GMRAIRPORT.NS",
-    "GRSE.NS", "GICRE.NS", "GILLETTE.NS", "GLAND.NS", "GLAXO.NS",
-    "GLENMARK.NS", "MEDANTA.NS", "GODIGIT.NS", "GPIL.NS", "GODFRYPHLP.NS",
-    "GODREJAGRO.NS", "GODREJCP.NS", "GODREJIND.NS", "GODREJPROP.NS", "GRANULES.NS",
-    "GRAPHITE.NS", "GRASIM.NS", "GRAVITA.NS", "GESHIP.NS", "FLUOROCHEM.NS",
-    "GUJGASLTD.NS", "GMDCLTD.NS", "GSPL.NS", "HEG.NS", "HBLENGINE.NS",
-    "HCLTECH.NS", "HDFCAMC.NS", "HDFCBANK.NS", "HDFCLIFE.NS", "HFCL.NS",
-    "HAPPSTMNDS.NS", "HAVELLS.NS", "HEROMOTOCO.NS", "HEXT.NS", "HSCL.NS",
-    "HINDALCO.NS", "HAL.NS", "HINDCOPPER.NS", "HINDPETRO.NS", "HINDUNILVR.NS",
-    "HINDZINC.NS", "POWERINDIA.NS", "HOMEFIRST.NS", "HONASA.NS", "HONAUT.NS",
-    "HUDCO.NS", "HYUNDAI.NS", "ICICIBANK.NS", "ICICIGI.NS", "ICICIPRULI.NS",
-    "IDBI.NS", "IDFCFIRSTB.NS", "IFCI.NS", "IIFL.NS", "INOXINDIA.NS",
-    "IRB.NS", "IRCON.NS", "ITCHOTELS.NS", "ITC.NS", "ITI.NS",
-    "INDGN.NS", "INDIACEM.NS", "INDIAMART.NS", "INDIANB.NS", "IEX.NS",
-    "INDHOTEL.NS", "IOC.NS", "IOB.NS", "IRCTC.NS", "IRFC.NS",
-    "IREDA.NS", "IGL.NS", "INDUSTOWER.NS", "INDUSINDBK.NS", "NAUKRI.NS",
-    "INFY.NS", "INOXWIND.NS", "INTELLECT.NS", "INDIGO.NS", "IGIL.NS",
-    "IKS.NS", "IPCALAB.NS", "JBCHEPHARM.NS", "JKCEMENT.NS", "JBMA.NS",
-    "JKTYRE.NS", "JMFINANCIL.NS", "JSWENERGY.NS", "JSWINFRA.NS", "JSWSTEEL.NS",
-    "JPPOWER.NS", "J&KBANK.NS", "JINDALSAW.NS", "JSL.NS", "JINDALSTEL.NS",
-    "JIOFIN.NS", "JUBLFOOD.NS", "JUBLINGREA.NS", "JUBLPHARMA.NS", "JWL.NS",
-    "JYOTHYLAB.NS", "JYOTICNC.NS", "KPRMILL.NS", "KEI.NS", "KPITTECH.NS",
-    "KSB.NS", "KAJARIACER.NS", "KPIL.NS", "KALYANKJIL.NS", "KARURVYSYA.NS",
-    "KAYNES.NS", "KEC.NS", "KFINTECH.NS", "KIRLOSBROS.NS", "KIRLOSENG.NS",
-    "KOTAKBANK.NS", "KIMS.NS", "LTF.NS", "LTTS.NS", "LICHSGFIN.NS",
-    "LTFOODS.NS", "LTIM.NS", "LT.NS", "LATENTVIEW.NS", "LAURUSLABS.NS",
-    "THELEELA.NS", "LEMONTREE.NS", "LICI.NS", "LINDEINDIA.NS", "LLOYDSME.NS",
-    "LODHA.NS", "LUPIN.NS", "MMTC.NS", "MRF.NS", "MGL.NS",
-    "MAHSCOOTER.NS", "MAHSEAMLES.NS", "M&MFIN.NS", "M&M.NS", "MANAPPURAM.NS",
-    "MRPL.NS", "MANKIND.NS", "MARICO.NS", "MARUTI.NS", "MFSL.NS",
-    "MAXHEALTH.NS", "MAZDOCK.NS", "METROPOLIS.NS", "MINDACORP.NS", "MSUMI.NS",
-    "MOTILALOFS.NS", "MPHASIS.NS", "MCX.NS", "MUTHOOTFIN.NS", "NATCOPHARM.NS",
-    "NBCC.NS", "NCC.NS", "NHPC.NS", "NLCINDIA.NS", "NMDC.NS",
-    "NSLNISP.NS", "NTPCGREEN.NS", "NTPC.NS", "NH.NS", "NATIONALUM.NS",
-    "NAVA.NS", "NAVINFLUOR.NS", "NESTLEIND.NS", "NETWEB.NS", "NEULANDLAB.NS",
-    "NEWGEN.NS", "NAM-INDIA.NS", "NIVABUPA.NS", "NUVAMA.NS", "NUVOCO.NS",
-    "OBEROIRLTY.NS", "ONGC.NS", "OIL.NS", "OLAELEC.NS", "OLECTRA.NS",
-    "PAYTM.NS", "ONESOURCE.NS", "OFSS.NS", "POLICYBZR.NS", "PCBL.NS",
-    "PGEL.NS", "PIIND.NS", "PNBHOUSING.NS", "PTCIL.NS", "PVRINOX.NS",
-    "PAGEIND.NS", "PATANJALI.NS", "PERSISTENT.NS", "PETRONET.NS", "PFIZER.NS",
-    "PHOENIXLTD.NS", "PIDILITIND.NS", "PPLPHARMA.NS", "POLYMED.NS", "POLYCAB.NS",
-    "POONAWALLA.NS", "PFC.NS", "POWERGRID.NS", "PRAJIND.NS", "PREMIERENE.NS",
-    "PRESTIGE.NS", "PGHH.NS", "PNB.NS", "RRKABEL.NS", "RBLBANK.NS",
-    "RECLTD.NS", "RHIM.NS", "RITES.NS", "RADICO.NS", "RVNL.NS",
-    "RAILTEL.NS", "RAINBOW.NS", "RKFORGE.NS", "RCF.NS", "REDINGTON.NS",
-    "RELIANCE.NS", "RELINFRA.NS", "RPOWER.NS", "SBFC.NS", "SBICARD.NS",
-    "SBILIFE.NS", "SJVN.NS", "SKFINDIA.NS", "SRF.NS", "SAGILITY.NS",
-    "SAILIFE.NS", "SAMMAANCAP.NS", "MOTHERSON.NS", "SAPPHIRE.NS", "SARDAEN.NS",
-    "SAREGAMA.NS", "SCHAEFFLER.NS", "SCHNEIDER.NS", "SCI.NS", "SHREECEM.NS",
-    "SHRIRAMFIN.NS", "SHYAMMETL.NS", "ENRIN.NS", "SIEMENS.NS", "SIGNATURE.NS",
-    "SOBHA.NS", "SOLARINDS.NS", "SONACOMS.NS", "SONATSOFTW.NS", "STARHEALTH.NS",
-    "SBIN.NS", "SAIL.NS", "SUMICHEM.NS", "SUNPHARMA.NS", "SUNTV.NS",
-    "SUNDARMFIN.NS", "SUNDRMFAST.NS", "SUPREMEIND.NS", "SUZLON.NS", "SWANCORP.NS",
-    "SWIGGY.NS", "SYNGENE.NS", "SYRMA.NS", "TBOTEK.NS", "TVSMOTOR.NS",
-    "TATACHEM.NS", "TATACOMM.NS", "TCS.NS", "TATACONSUM.NS", "TATAELXSI.NS",
-    "TATAINVEST.NS", "TMPV.NS", "TATAPOWER.NS", "TATASTEEL.NS", "TATATECH.NS",
-    "TTML.NS", "TECHM.NS", "TECHNOE.NS", "TEJASNET.NS", "NIACL.NS",
-    "RAMCOCEM.NS", "THERMAX.NS", "TIMKEN.NS", "TITAGARH.NS", "TITAN.NS",
-    "TORNTPHARM.NS", "TORNTPOWER.NS", "TARIL.NS", "TRENT.NS", "TRIDENT.NS",
-    "TRIVENI.NS", "TRITURBINE.NS", "TIINDIA.NS", "UCOBANK.NS", "UNOMINDA.NS",
-    "UPL.NS", "UTIAMC.NS", "ULTRACEMCO.NS", "UNIONBANK.NS", "UBL.NS",
-    "UNITDSPR.NS", "USHAMART.NS", "VGUARD.NS", "DBREALTY.NS", "VTL.NS",
-    "VBL.NS", "MANYAVAR.NS", "VEDL.NS", "VENTIVE.NS", "VIJAYA.NS",
-    "VMM.NS", "IDEA.NS", "VOLTAS.NS", "WAAREEENER.NS", "WELCORP.NS",
-    "WELSPUNLIV.NS", "WHIRLPOOL.NS", "WIPRO.NS", "WOCKPHARMA.NS", "YESBANK.NS",
-    "ZFCVINDIA.NS", "ZEEL.NS", "ZENTEC.NS", "ZENSARTECH.NS", "ZYDUSLIFE.NS",
-    "ECLERX.NS"
-]
+# NSE 500 constituents (Yahoo Finance symbols) from the security master
+NSE500_STOCKS = get_security_master().nse500_yahoo_symbols()
 
 def calculate_rsi(data, period=14):
     """Calculate Relative Strength Index
@@ -124,31 +26,37 @@ def calculate_rsi(data, period=14):
     if len(data) < period:
         return None
     
+    return calculate_rsi_series(data, period).iloc[-1]
+
+def calculate_rsi_series(data, period=14):
+    """Calculate the RSI for every bar in one pass
+    
+    Each value equals calculate_rsi on the data up to and including that bar,
+    since the rolling means only look backwards.
+    """
     delta = data['Close'].diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
     loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
     
     rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi.iloc[-1]
+    return 100 - (100 / (1 + rs))
 
-def detect_divergence(data):
+def detect_divergence(data, rsi=None):
     """Detect RSI divergence patterns
     
     Bullish Divergence: Price makes lower low, RSI makes higher low
     Bearish Divergence: Price makes higher high, RSI makes lower high
     
+    Pass `rsi` (the 14-period RSI series of `data`) to reuse an already computed series.
+    
     Returns: divergence signal as string or None
     """
     if len(data) < 50:
         return None
     
     # Calculate RSI
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
+    if rsi is None:
+        rsi = calculate_rsi_series(data, period=14)
     
     # Look at last 30 days to find local highs/lows
     recent_close = data['Close'].tail(30)
@@ -185,6 +93,67 @@ def detect_divergence(data):
     
     return None
 
+def _last_two_extrema(mask, n, window=30):
+    """For each bar i, positions of the last two flagged bars inside the
+    look-back window used by detect_divergence (bars i-window+2 .. i-1)
+    
+    Returns (latest, previous, valid) arrays; valid is False where the window
+    holds fewer than two flagged bars.
+    """
+    positions = np.flatnonzero(mask)
+    bars = np.arange(n)
+    
+    # Index (into positions) of the last flagged bar at or before i-1
+    rank = np.searchsorted(positions, bars - 1, side='right') - 1
+    valid = rank >= 1
+    
+    latest = np.zeros(n, dtype=int)
+    previous = np.zeros(n, dtype=int)
+    latest[valid] = positions[rank[valid]]
+    previous[valid] = positions[rank[valid] - 1]
+    
+    # Both extrema must fall inside the window (the first bar of the window is never an extremum)
+    valid &= previous >= bars - (window - 2)
+    return latest, previous, valid
+
+def detect_divergence_series(data, rsi=None):
+    """Detect RSI divergence for every bar in one vectorized pass
+    
+    Each value equals detect_divergence on the data up to and including that
+    bar: local lows/highs are found once for the whole series and the last two
+    inside each 30-bar window are compared. Pass `rsi` to reuse a computed series.
+    
+    Returns: pandas.Series of "Bullish Divergence", "Bearish Divergence" or None
+    """
+    n = len(data)
+    signals = np.full(n, None, dtype=object)
+    if n < 50:
+        return pd.Series(signals, index=data.index, dtype=object)
+    
+    close = data['Close'].to_numpy(dtype=float)
+    if rsi is None:
+        rsi = calculate_rsi_series(data, period=14)
+    rsi = np.asarray(rsi, dtype=float)
+    
+    # Local extrema: strictly below/above both neighbours
+    is_low = np.zeros(n, dtype=bool)
+    is_high = np.zeros(n, dtype=bool)
+    is_low[1:-1] = (close[1:-1] < close[:-2]) & (close[1:-1] < close[2:])
+    is_high[1:-1] = (close[1:-1] > close[:-2]) & (close[1:-1] > close[2:])
+    
+    # Bullish: lower price low with a higher RSI low
+    latest, previous, valid = _last_two_extrema(is_low, n)
+    bullish = valid & (close[latest] < close[previous]) & (rsi[latest] > rsi[previous])
+    
+    # Bearish: higher price high with a lower RSI high
+    latest, previous, valid = _last_two_extrema(is_high, n)
+    bearish = valid & (close[latest] > close[previous]) & (rsi[latest] < rsi[previous])
+    
+    signals[bearish] = "Bearish Divergence"
+    signals[bullish] = "Bullish Divergence"
+    signals[:49] = None
+    return pd.Series(signals, index=data.index, dtype=object)
+
 def detect_recent_cross(data, days=7):
     """Detect if stock had Golden/Death cross in past N days
     
@@ -226,6 +195,128 @@ def detect_recent_cross(data, days=7):
     
     return cross_type, cross_date, cross_price
 
+def _rolling_mean_panel(values, window):
+    """Rolling mean down the rows of a 2-D array (one column per symbol)
+    
+    Matches pandas rolling(window).mean(): a row is NaN until the window holds
+    `window` non-NaN values.
+    """
+    rows, cols = values.shape
+    result = np.full((rows, cols), np.nan)
+    if rows < window:
+        return result
+    
+    valid = ~np.isnan(values)
+    sums = np.zeros((rows + 1, cols))
+    counts = np.zeros((rows + 1, cols))
+    np.cumsum(np.where(valid, values, 0.0), axis=0, out=sums[1:])
+    np.cumsum(valid, axis=0, out=counts[1:])
+    
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    result[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return result
+
+def build_close_panel(histories, align_on_dates=False):
+    """Build a wide close matrix from per-symbol OHLCV frames
+    
+    Args:
+        histories (dict): Mapping of symbol to a DataFrame with a 'Close' column
+        align_on_dates (bool): By default each column holds the symbol's own bars
+            right-aligned and the index counts bars back from the end (-1 is every
+            symbol's latest bar), so rolling windows match a per-symbol computation
+            exactly even when calendars differ. When True rows are aligned on
+            calendar dates instead; a symbol missing a date then has a NaN there,
+            which delays its moving averages, so use it only for shared calendars
+    
+    Returns:
+        pandas.DataFrame: Close prices, one column per symbol
+    """
+    closes = {symbol: data['Close'] for symbol, data in histories.items() if data is not None and not data.empty}
+    if not closes:
+        return pd.DataFrame()
+    
+    if align_on_dates:
+        return pd.DataFrame(closes).sort_index()
+    
+    length = max(len(close) for close in closes.values())
+    values = np.full((length, len(closes)), np.nan)
+    for col, close in enumerate(closes.values()):
+        values[length - len(close):, col] = close.to_numpy(dtype=float)
+    return pd.DataFrame(values, index=pd.RangeIndex(-length, 0), columns=list(closes))
+
+def detect_recent_crosses_panel(closes, days=7, dates=None):
+    """Detect Golden/Death crosses in past N days for a whole universe at once
+    
+    Vectorized counterpart of detect_recent_cross: MA50, MA200 and the cross
+    masks are computed for every column of `closes` in a single NumPy pass.
+    
+    Args:
+        closes (pandas.DataFrame): Close prices, dates x symbols (see build_close_panel)
+        days (int): Number of most recent rows to look for crosses in
+        dates (dict): Symbol -> its own date index; required for a bar-offset
+            panel (the build_close_panel default), whose rows are not dates
+    
+    Returns:
+        pandas.DataFrame: Indexed by symbol with 'Cross Type', 'Cross Date' and
+        'Cross Price' columns (None/NaT/NaN when the symbol had no recent cross)
+    """
+    if dates is None and isinstance(closes.index, pd.RangeIndex):
+        raise ValueError("dates are required for a bar-offset panel")
+    
+    symbols = list(closes.columns)
+    cross_types = [None] * len(symbols)
+    cross_dates = [pd.NaT] * len(symbols)
+    cross_prices = [np.nan] * len(symbols)
+    
+    def to_frame():
+        return pd.DataFrame({
+            'Cross Type': cross_types,
+            'Cross Date': cross_dates,
+            'Cross Price': cross_prices
+        }, index=symbols)
+    
+    if len(closes) < 200 or not symbols:
+        return to_frame()
+    
+    values = closes.to_numpy(dtype=float)
+    ma_50 = _rolling_mean_panel(values, 50)
+    ma_200 = _rolling_mean_panel(values, 200)
+    
+    # Previous-row comparisons (first row has no previous value)
+    prev_le = np.zeros(values.shape, dtype=bool)
+    prev_ge = np.zeros(values.shape, dtype=bool)
+    prev_le[1:] = ma_50[:-1] <= ma_200[:-1]
+    prev_ge[1:] = ma_50[:-1] >= ma_200[:-1]
+    
+    golden = (ma_50 > ma_200) & prev_le
+    death = (ma_50 < ma_200) & prev_ge
+    
+    recent_golden = golden[-days:]
+    recent_death = death[-days:]
+    offset = len(values) - len(recent_golden)
+    
+    # Row of the latest cross in the window; golden takes priority like detect_recent_cross
+    has_golden = recent_golden.any(axis=0)
+    has_death = recent_death.any(axis=0) & ~has_golden
+    last_golden = offset + len(recent_golden) - 1 - np.argmax(recent_golden[::-1], axis=0)
+    last_death = offset + len(recent_death) - 1 - np.argmax(recent_death[::-1], axis=0)
+    
+    cross_rows = np.where(has_golden, last_golden, last_death)
+    has_cross = has_golden | has_death
+    
+    for col in np.flatnonzero(has_cross):
+        row = cross_rows[col]
+        cross_types[col] = 'Golden Cross' if has_golden[col] else 'Death Cross'
+        if dates is not None:
+            # Rows are right-aligned, so counting back from the end finds the symbol's own bar
+            cross_dates[col] = dates[symbols[col]][row - len(values)]
+        else:
+            cross_dates[col] = closes.index[row]
+        cross_prices[col] = values[row, col]
+    
+    return to_frame()
+
 def get_recommendation(rsi, roi, cross_type):
     """Get buy/hold/sell recommendation based on metrics
     
@@ -267,103 +358,257 @@ def get_recommendation(rsi, roi, cross_type):
         else:
             return 'SELL', 'Negative trend'
 
-@st.cache_data(ttl=3600)
-def analyze_nse500_crosses():
-    """Analyze NSE 500 stocks for Golden/Death cross in past week
+class IndicatorContext:
+    """Indicators for one price frame, each computed at most once
     
-    Processes all 500 stocks and returns those with recent crosses
+    The scan and the detail page need the same RSI series for the current
+    RSI, divergence and recommendation; sharing a context avoids recomputing
+    it for every step.
     """
-    results = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
     
-    total_stocks = len(NSE500_STOCKS)
+    def __init__(self, data, rsi_period=14):
+        self.data = data
+        self.rsi_period = rsi_period
+        self._rsi_series = None
+        self._divergence_series = None
+    
+    @property
+    def rsi_series(self):
+        """RSI for every bar"""
+        if self._rsi_series is None:
+            self._rsi_series = calculate_rsi_series(self.data, self.rsi_period)
+        return self._rsi_series
+    
+    @property
+    def rsi(self):
+        """Latest RSI value (None with fewer bars than the RSI period)"""
+        if len(self.data) < self.rsi_period:
+            return None
+        return self.rsi_series.iloc[-1]
+    
+    @property
+    def divergence(self):
+        """Divergence signal for the latest bar"""
+        return detect_divergence(self.data, rsi=self.rsi_series)
+    
+    @property
+    def divergence_series(self):
+        """Divergence signal for every bar"""
+        if self._divergence_series is None:
+            self._divergence_series = detect_divergence_series(self.data, rsi=self.rsi_series)
+        return self._divergence_series
+    
+    def recommendation(self, roi, cross_type):
+        """Buy/hold/sell recommendation using the shared RSI (see get_recommendation)"""
+        return get_recommendation(self.rsi, roi, cross_type)
+
+# Column dtypes of the scan report; formatting happens in the Streamlit column_config
+REPORT_DTYPES = {
+    'Symbol': 'string',
+    'Company Name': 'string',
+    'Cross Type': pd.CategoricalDtype(['Golden Cross', 'Death Cross']),
+    'Cross Date': 'datetime64[ns]',
+    'Price at Cross': 'float32',
+    'Current Price': 'float32',
+    'Price Change %': 'float32',
+    'RSI': 'float32',
+    'P/E Ratio': 'float32',
+    'ROI %': 'float32',
+    'Divergence': pd.CategoricalDtype(['Bullish Divergence', 'Bearish Divergence', 'None']),
+    'Recommendation': pd.CategoricalDtype(['BUY', 'HOLD', 'SELL']),
+    'Reason': 'string',
+}
+
+def _pe_value(pe_ratio):
+    return float(pe_ratio) if isinstance(pe_ratio, (int, float)) else np.nan
+
+def _build_report_row(symbol, data, cross_type, cross_date, cross_price):
+    """Build the report row for a symbol with a recent cross"""
+    indicators = IndicatorContext(data)
+    
+    # Get current price
+    current_price = data['Close'].iloc[-1]
     
-    for idx, symbol in enumerate(NSE500_STOCKS):
-        try:
-            status_text.text(f"Analyzing {symbol}... ({idx+1}/{total_stocks})")
-            
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period='1y')
-            
-            if data.empty or len(data) < 200:
-                progress_bar.progress((idx + 1) / total_stocks)
-                continue
-            
-            # Detect cross
-            cross_type, cross_date, cross_price = detect_recent_cross(data, days=7)
+    # Calculate metrics
+    roi = ((current_price - data['Close'].iloc[0]) / data['Close'].iloc[0]) * 100
+    
+    return _report_row(symbol, cross_type, cross_date, cross_price, current_price,
+                       indicators.rsi, roi, indicators.divergence, indicators.recommendation(roi, cross_type))
+
+def _report_row(symbol, cross_type, cross_date, cross_price, current_price, rsi, roi, divergence, recommendation):
+    """Report row of raw values from already computed indicators (typed by rows_to_report)
+    
+    `recommendation` is the (recommendation, reason) pair of get_recommendation.
+    """
+    # Name and P/E come from the local fundamentals snapshot, never from ticker.info
+    fundamentals = get_fundamentals_store().get(symbol) or {}
+    
+    # Calculate % change since cross
+    pct_change = ((current_price - cross_price) / cross_price) * 100
+    
+    recommendation, reason = recommendation
+    
+    # Get stock name
+    stock_name = fundamentals.get('name') or symbol.replace('.NS', '')
+    
+    # Cross dates are trading days; drop the exchange timezone
+    cross_date = pd.Timestamp(cross_date)
+    if cross_date.tzinfo is not None:
+        cross_date = cross_date.tz_localize(None)
+    
+    return {
+        'Symbol': symbol.replace('.NS', ''),
+        'Company Name': stock_name,
+        'Cross Type': cross_type,
+        'Cross Date': cross_date.normalize(),
+        'Price at Cross': cross_price,
+        'Current Price': current_price,
+        'Price Change %': pct_change,
+        'RSI': rsi if rsi is not None else np.nan,
+        'P/E Ratio': _pe_value(fundamentals.get('pe_ratio')),
+        'ROI %': roi,
+        'Divergence': divergence if divergence else "None",
+        'Recommendation': recommendation,
+        'Reason': reason,
+    }
+
+def _state_report_row(symbol, state):
+    """Report row from a carried SymbolScanState, or None without a recent cross"""
+    cross_type, cross_date, cross_price = state.recent_cross()
+    if cross_type is None:
+        return None
+    
+    closes, rsi = state.divergence_frame()
+    divergence = detect_divergence(closes, rsi=rsi)
+    
+    return _report_row(symbol, cross_type, cross_date, cross_price, state.current_price,
+                       state.rsi, state.roi, divergence, get_recommendation(state.rsi, state.roi, cross_type))
+
+def _advance_state(states, symbol, data, days=7):
+    """Bring a symbol's carried SymbolScanState up to date and return its report row (or None)
+    
+    The state is advanced by the bars newer than its last bar, an O(1) update
+    per bar, and rebuilt from the history only when it is missing or no longer
+    agrees with it (see SymbolScanState.update_from).
+    """
+    if data is None or len(data) < 200:
+        return None
+    
+    state = states.get(symbol)
+    if state is None or state.days != days or not state.update_from(data):
+        state = SymbolScanState.from_history(data, days=days)
+    states[symbol] = state
+    
+    return _state_report_row(symbol, state)
+
+def iter_nse500_scan(incremental=True, days=7):
+    """Analyze NSE 500 stocks for Golden/Death cross in past week, one symbol at a time
+    
+    Histories are loaded with batched downloads (mostly served locally) and
+    each batch is analyzed as soon as it arrives, so the first rows are
+    available long before the whole universe is done. With `incremental` (the
+    default) the per-symbol rolling state carried over from the previous scan
+    is advanced by the new bars only (see _advance_state). On a cold start (no
+    carried state yet, or incremental=False) crosses are detected per batch in
+    one vectorized pass (see detect_recent_crosses_panel) and report rows are
+    built for the crossed stocks only; the carried
+    state is then seeded from the same histories so the next scan is
+    incremental.
+    
+    Does not touch Streamlit, so it can also run on a background thread (see
+    utils.report_snapshots).
+    
+    Yields:
+        tuple: (symbol, report row or None) for every symbol in NSE500_STOCKS,
+        in completion order (see rows_to_report).
+    """
+    # Keep fundamentals snapshots warm without waiting for them
+    get_fundamentals_store().refresh_in_background(NSE500_STOCKS)
+    
+    state_store = get_scan_state_store()
+    states = state_store.load() if incremental else {}
+    
+    # Without carried state every symbol would be replayed bar by bar before its row is known
+    incremental = bool(states)
+    
+    try:
+        chunks = get_ohlcv_store().iter_many(NSE500_STOCKS, '1y')
+        for histories, failures, _, _ in chunks:
+            for symbol in failures:
+                yield symbol, None
             
-            if cross_type is None:
-                progress_bar.progress((idx + 1) / total_stocks)
+            if incremental:
+                for symbol, data in histories.items():
+                    yield symbol, _advance_state(states, symbol, data, days=days)
                 continue
             
-            # Get current price
-            current_price = data['Close'].iloc[-1]
-            
-            # Calculate metrics
-            rsi = calculate_rsi(data)
-            roi = ((current_price - data['Close'].iloc[0]) / data['Close'].iloc[0]) * 100
-            
-            # Get PE ratio
-            pe_ratio = ticker.info.get('trailingPE', 'N/A')
-            
-            # Calculate % change since cross
-            pct_change = ((current_price - cross_price) / cross_price) * 100
+            # Cross detection for the whole batch in one vectorized pass
+            eligible = {symbol: data for symbol, data in histories.items() if len(data) >= 200}
+            crossed = []
+            if eligible:
+                panel = build_close_panel(eligible)
+                dates = {symbol: data.index for symbol, data in eligible.items()}
+                crosses = detect_recent_crosses_panel(panel, days=days, dates=dates)
+                crossed = [symbol for symbol in eligible if isinstance(crosses.at[symbol, 'Cross Type'], str)]
             
-            # Get recommendation
-            recommendation, reason = get_recommendation(rsi, roi, cross_type)
+            for symbol in histories:
+                if symbol not in crossed:
+                    yield symbol, None
             
-            # Detect divergence
-            divergence = detect_divergence(data)
+            # Metrics and fundamentals only for the stocks that crossed (local data, so no pool is needed)
+            for symbol in crossed:
+                cross = crosses.loc[symbol]
+                yield symbol, _build_report_row(symbol, eligible[symbol], cross['Cross Type'],
+                                                cross['Cross Date'], cross['Cross Price'])
             
-            # Get stock name
-            stock_name = ticker.info.get('longName', symbol.replace('.NS', ''))
-            
-            results.append({
-                'Symbol': symbol.replace('.NS', ''),
-                'Company Name': stock_name,
-                'Cross Type': cross_type,
-                'Cross Date': cross_date.strftime('%Y-%m-%d'),
-                'Price at Cross': f"₹{cross_price:.2f}",
-                'Current Price': f"₹{current_price:.2f}",
-                'Price Change %': f"{pct_change:+.2f}%",
-                'RSI': f"{rsi:.2f}" if rsi else "N/A",
-                'P/E Ratio': f"{pe_ratio:.2f}" if isinstance(pe_ratio, (int, float)) else "N/A",
-                'ROI %': f"{roi:.2f}%",
-                'Divergence': divergence if divergence else "None",
-                'Recommendation': recommendation,
-                'Reason': reason,
-                'pct_value': pct_change
-            })
-            
-            progress_bar.progress((idx + 1) / total_stocks)
-            
-        except Exception as e:
-            progress_bar.progress((idx + 1) / total_stocks)
-            continue
-    
-    status_text.empty()
-    progress_bar.empty()
-    
-    if results:
-        # Sort by price change
-        results.sort(key=lambda x: x['pct_value'], reverse=True)
-        # Remove sorting column
-        for result in results:
-            del result['pct_value']
-        
-        return pd.DataFrame(results)
+            # Seed the carried state after the batch's rows are out
+            for symbol, data in eligible.items():
+                states[symbol] = SymbolScanState.from_history(data, days=days)
+    finally:
+        state_store.save(states)
+
+def rows_to_report(rows):
+    """Typed report DataFrame (see REPORT_DTYPES) sorted by price change since the cross, or None without rows"""
+    if not rows:
+        return None
     
-    return None
+    rows = sorted(rows, key=lambda x: x['Price Change %'], reverse=True)
+    return pd.DataFrame(rows, columns=list(REPORT_DTYPES)).astype(REPORT_DTYPES)
 
-def filter_results(df, cross_type=None, recommendation=None):
-    """Filter results by cross type or recommendation"""
+def apply_fundamentals(df):
+    """Fill Company Name and P/E Ratio from the local fundamentals snapshots
+    
+    The cached report may have been built before the background refresh
+    finished; this is a local lookup and cheap to run on every render.
+    """
+    if df is None or df.empty:
+        return df
+    
+    snapshots = get_fundamentals_store().get_many(f"{symbol}.NS" for symbol in df['Symbol'])
+    if not snapshots:
+        return df
+    
+    df = df.copy()
+    for idx, symbol in df['Symbol'].items():
+        snapshot = snapshots.get(f"{symbol}.NS")
+        if snapshot:
+            if snapshot.get('name'):
+                df.at[idx, 'Company Name'] = snapshot['name']
+            df.at[idx, 'P/E Ratio'] = _pe_value(snapshot.get('pe_ratio'))
+    
+    return df
+
+def filter_results(df, cross_type=None, recommendation=None, sector=None):
+    """Filter results by cross type, recommendation or sector"""
     if cross_type and cross_type != "All":
         df = df[df['Cross Type'] == cross_type]
     
     if recommendation and recommendation != "All":
         df = df[df['Recommendation'] == recommendation]
     
+    if sector and sector != "All":
+        df = df[df['Symbol'].isin(get_sector_index().symbols(sector))]
+    
     return df
 
 def get_rsi_education():
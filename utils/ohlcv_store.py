@@ -0,0 +1,414 @@
+"""
+Persistent local OHLCV store for StockScope
+Keeps daily bars per symbol on disk and only downloads the missing tail from Yahoo Finance
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from utils.shared import atomic_write, download, process_singleton
+
+logger = logging.getLogger(__name__)
+
+# Where local data lives; override with STOCKSCOPE_DATA_DIR (e.g. a shared volume for replicas)
+DATA_DIR = os.environ.get(
+    'STOCKSCOPE_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.stockscope_data')
+)
+DEFAULT_STORE_DIR = os.path.join(DATA_DIR, 'ohlcv')
+
+# Seconds before a stored symbol is checked for new bars again
+STORE_REFRESH_INTERVAL = 900
+
+# Symbols per multi-ticker download request
+DOWNLOAD_BATCH_SIZE = 50
+
+# Network timeout (seconds) for downloads when the caller does not pass one; yfinance's own default
+DOWNLOAD_TIMEOUT = 10
+
+# Longest history downloaded for a symbol on first use; every shorter period is sliced from it
+STORE_BASE_PERIOD = "5y"
+
+# Calendar length of each yfinance period string the store can serve
+# ("Nd" periods are counted in trading days by yfinance and sliced by rows instead)
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+TRADING_DAY_PERIODS = {"1d": 1, "2d": 2, "5d": 5}
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """First calendar date covered by a period string, or None for trading-day periods"""
+    now = now if now is not None else pd.Timestamp.now()
+    if period in PERIOD_OFFSETS:
+        return now.normalize() - PERIOD_OFFSETS[period]
+    return None
+
+
+def slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Cut a daily history down to a yfinance period.
+
+    Month/year periods are sliced on calendar dates (1mo from 17 Sep is 17 Aug),
+    "Nd" periods keep the last N bars like yfinance does.
+    """
+    if data is None or data.empty:
+        return data
+
+    if period in TRADING_DAY_PERIODS:
+        return data.tail(TRADING_DAY_PERIODS[period])
+
+    start = period_start(period, pd.Timestamp.now(tz=data.index.tz))
+    if start is None:
+        return data
+    return data[data.index >= start]
+
+
+def _base_period(period: str) -> str:
+    """Period to download so that `period` and every shorter one can be served locally"""
+    ordered = list(PERIOD_OFFSETS)
+    if period in PERIOD_OFFSETS and ordered.index(period) > ordered.index(STORE_BASE_PERIOD):
+        return period
+    return STORE_BASE_PERIOD
+
+
+class OHLCVStore:
+    """On-disk store of daily OHLCV bars keyed by Yahoo Finance symbol.
+
+    Each symbol is kept in its own Parquet file, with the first date its history
+    covers and the time of the last update in the file's metadata. The first request for a
+    symbol downloads STORE_BASE_PERIOD of history; every shorter period is then
+    sliced from it locally. Only bars after the last stored date are fetched when
+    the entry is older than the refresh interval. Loaded entries are also kept in
+    memory so switching periods does not touch the disk either.
+    """
+
+    def __init__(self, root: Optional[str] = None, refresh_interval: int = STORE_REFRESH_INTERVAL):
+        self.root = root or DEFAULT_STORE_DIR
+        self.refresh_interval = refresh_interval
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._memory: Dict[str, Dict] = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        # Symbols such as M&M.NS or ARE&M.NS need escaping to be safe file names
+        return os.path.join(self.root, f"{quote(symbol.upper(), safe='')}.parquet")
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def load(self, symbol: str) -> Optional[Dict]:
+        """Load the stored entry for a symbol, or None if nothing usable is stored"""
+        key = symbol.upper()
+        if key in self._memory:
+            return self._memory[key]
+
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            data = pd.read_parquet(path)
+            # covered_from and updated_at travel as DataFrame.attrs in the Parquet metadata
+            meta, data.attrs = data.attrs, {}
+            entry = {'data': data, 'covered_from': pd.Timestamp(meta['covered_from']), 'updated_at': float(meta['updated_at'])}
+        except Exception as e:
+            logger.warning(f"Discarding unreadable store entry for {symbol}: {str(e)}")
+            return None
+
+        self._memory[key] = entry
+        return entry
+
+    def save(self, symbol: str, entry: Dict) -> None:
+        """Write an entry atomically so concurrent readers never see a partial file"""
+        self._memory[symbol.upper()] = entry
+        data = entry['data'].copy(deep=False)
+        data.attrs = {'covered_from': entry['covered_from'].isoformat(), 'updated_at': entry['updated_at']}
+        try:
+            atomic_write(self._path(symbol), data.to_parquet)
+        except Exception as e:
+            logger.warning(f"Could not write store entry for {symbol}: {str(e)}")
+
+    def get_history(self, symbol: str, period: str = "6mo", timeout: float = DOWNLOAD_TIMEOUT) -> pd.DataFrame:
+        """
+        Get daily bars for a symbol, using the local store where possible.
+
+        Args:
+            symbol (str): Yahoo Finance symbol (e.g. RELIANCE.NS)
+            period (str): yfinance period string (1mo, 3mo, 6mo, 1y, 2y, 5y, ...)
+            timeout (float): Network timeout for any download that is needed
+
+        Returns:
+            pandas.DataFrame: Raw yfinance history (empty if the symbol has no data)
+        """
+        if period not in PERIOD_OFFSETS and period not in TRADING_DAY_PERIODS:
+            # Periods such as "max" or "ytd" are not tracked by the store
+            return yf.Ticker(symbol).history(period=period, timeout=timeout)
+
+        with self._lock_for(symbol):
+            entry = self.load(symbol)
+            start = period_start(period)
+
+            if entry is None or 'covered_from' not in entry or (start is not None and start < entry['covered_from']):
+                base_period = _base_period(period)
+                data = yf.Ticker(symbol).history(period=base_period, timeout=timeout)
+                if data.empty:
+                    return data
+
+                if entry is not None:
+                    data = _merge_bars(entry['data'], data)
+
+                entry = {'data': data, 'covered_from': period_start(base_period), 'updated_at': time.time()}
+                self.save(symbol, entry)
+
+            elif time.time() - entry['updated_at'] > self.refresh_interval:
+                entry = self._append_tail(symbol, entry, timeout)
+
+        return slice_period(entry['data'], period)
+
+    def get_many(self, symbols: List[str], period: str = "6mo", batch_size: int = DOWNLOAD_BATCH_SIZE,
+                 timeout: float = DOWNLOAD_TIMEOUT,
+                 on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Get daily bars for many symbols, downloading what is missing in multi-ticker batches.
+
+        Symbols already covered by the store are served locally, symbols that are
+        due for a refresh get one batched tail download, and unknown symbols get
+        one batched history download per `batch_size` symbols.
+
+        Args:
+            symbols (list): Yahoo Finance symbols
+            period (str): yfinance period string
+            batch_size (int): Symbols per download request
+            timeout (float): Network timeout per download request
+            on_progress (callable): Called as on_progress(done, total) after each batch
+
+        Returns:
+            tuple: (dict of symbol -> raw history, dict of symbol -> error message)
+        """
+        histories: Dict[str, pd.DataFrame] = {}
+        failures: Dict[str, str] = {}
+        for chunk, chunk_failures, done, total in self.iter_many(symbols, period, batch_size, timeout):
+            histories.update(chunk)
+            failures.update(chunk_failures)
+            if on_progress and done:
+                on_progress(done, total)
+        return histories, failures
+
+    def iter_many(self, symbols: List[str], period: str = "6mo", batch_size: int = DOWNLOAD_BATCH_SIZE,
+                  timeout: float = DOWNLOAD_TIMEOUT) -> Iterator[Tuple[Dict[str, pd.DataFrame], Dict[str, str], int, int]]:
+        """
+        Like get_many(), but yield each chunk of histories as soon as it is available.
+
+        The symbols served locally come first (with done == 0), then one chunk
+        per download batch, so callers can start on them before the slow batches finish.
+
+        Yields:
+            tuple: (dict of symbol -> raw history, dict of symbol -> error message,
+            batches done, total batches)
+        """
+        histories: Dict[str, pd.DataFrame] = {}
+        failures: Dict[str, str] = {}
+        tracked = period in PERIOD_OFFSETS or period in TRADING_DAY_PERIODS
+        start = period_start(period)
+        now = time.time()
+
+        missing, stale = [], []
+        for symbol in dict.fromkeys(symbols):
+            entry = self.load(symbol) if tracked else None
+            if entry is None or 'covered_from' not in entry or (start is not None and start < entry['covered_from']):
+                missing.append(symbol)
+            elif now - entry['updated_at'] > self.refresh_interval:
+                stale.append(symbol)
+            else:
+                histories[symbol] = slice_period(entry['data'], period)
+
+        batches = [('history', missing[i:i + batch_size]) for i in range(0, len(missing), batch_size)]
+        batches += [('tail', stale[i:i + batch_size]) for i in range(0, len(stale), batch_size)]
+        yield histories, failures, 0, len(batches)
+
+        for done, (kind, batch) in enumerate(batches, start=1):
+            histories, failures = {}, {}
+            if kind == 'history':
+                download_period = _base_period(period) if tracked else period
+                try:
+                    frames = _download_batch(batch, timeout=timeout, period=download_period)
+                except Exception as e:
+                    logger.error(f"Error downloading batch {batch}: {str(e)}")
+                    failures.update({symbol: str(e) for symbol in batch})
+                    frames = {}
+
+                for symbol in batch:
+                    data = frames.get(symbol)
+                    if data is None or data.empty:
+                        failures.setdefault(symbol, "No data returned")
+                        continue
+
+                    if not tracked:
+                        histories[symbol] = data
+                        continue
+
+                    with self._lock_for(symbol):
+                        entry = self.load(symbol)
+                        if entry is not None:
+                            data = _merge_bars(entry['data'], data)
+                        entry = {'data': data, 'covered_from': period_start(download_period), 'updated_at': time.time()}
+                        self.save(symbol, entry)
+                    histories[symbol] = slice_period(data, period)
+
+            else:
+                entries = {symbol: self.load(symbol) for symbol in batch}
+                # One request from the oldest reference bar in the batch covers every symbol's tail
+                tail_start = min(_reference_date(entry['data']) for entry in entries.values()).strftime('%Y-%m-%d')
+                try:
+                    frames = _download_batch(batch, timeout=timeout, start=tail_start)
+                except Exception as e:
+                    logger.warning(f"Could not update batch {batch}, serving stored bars: {str(e)}")
+                    frames = {}
+
+                rebased = [symbol for symbol, entry in entries.items()
+                           if frames.get(symbol) is not None and _adjustments_changed(entry['data'], frames[symbol])]
+                if rebased:
+                    # Split, bonus or dividend: the stored bars are adjusted differently now, download them again
+                    rebase_start = min(entries[symbol]['covered_from'] for symbol in rebased)
+                    try:
+                        rebuilt = _download_batch(rebased, timeout=timeout, start=rebase_start.strftime('%Y-%m-%d'))
+                    except Exception as e:
+                        logger.warning(f"Could not re-download adjusted history for {rebased}: {str(e)}")
+                        rebuilt = {}
+
+                for symbol, entry in entries.items():
+                    tail = frames.get(symbol)
+                    if symbol in rebased:
+                        data = rebuilt.get(symbol)
+                        if data is not None and not data.empty:
+                            with self._lock_for(symbol):
+                                entry = {'data': data, 'covered_from': rebase_start, 'updated_at': time.time()}
+                                self.save(symbol, entry)
+                    elif tail is not None:
+                        with self._lock_for(symbol):
+                            data = entry['data'] if tail.empty else _merge_bars(entry['data'], tail)
+                            entry = dict(entry, data=data, updated_at=time.time())
+                            self.save(symbol, entry)
+                    histories[symbol] = slice_period(entry['data'], period)
+
+            yield histories, failures, done, len(batches)
+
+    def _append_tail(self, symbol: str, entry: Dict, timeout: float) -> Dict:
+        """Fetch bars from the last finalized stored date onwards and merge them in"""
+        data = entry['data']
+
+        try:
+            # Re-fetch the last stored day as well, it may have been a partial intraday bar
+            tail = yf.Ticker(symbol).history(start=_reference_date(data).strftime('%Y-%m-%d'), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Could not update {symbol}, serving stored bars: {str(e)}")
+            return entry
+
+        if _adjustments_changed(data, tail):
+            # Split, bonus or dividend: the stored bars are adjusted differently now, download them again
+            try:
+                history = yf.Ticker(symbol).history(start=entry['covered_from'].strftime('%Y-%m-%d'), timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Could not re-download adjusted history for {symbol}, serving stored bars: {str(e)}")
+                return entry
+            if history.empty:
+                return entry
+            data = history
+        elif not tail.empty:
+            data = _merge_bars(data, tail)
+
+        entry = dict(entry, data=data, updated_at=time.time())
+        self.save(symbol, entry)
+        return entry
+
+
+def _download_batch(symbols: List[str], timeout: float = DOWNLOAD_TIMEOUT, **kwargs) -> Dict[str, pd.DataFrame]:
+    """Download several symbols in one request and split the result per symbol"""
+    data = download(
+        symbols,
+        group_by='ticker',
+        auto_adjust=True,
+        actions=True,
+        ignore_tz=False,
+        threads=True,
+        progress=False,
+        timeout=timeout,
+        **kwargs
+    )
+
+    frames: Dict[str, pd.DataFrame] = {}
+    if data is None or data.empty:
+        return frames
+
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol].copy()
+        elif len(symbols) == 1:
+            frame = data.copy()
+        else:
+            continue
+
+        # Rows where only other symbols traded come back as NaN
+        frame.columns.name = None
+        frames[symbol] = frame.dropna(subset=['Close'])
+
+    return frames
+
+
+def _reference_date(stored: pd.DataFrame) -> pd.Timestamp:
+    """Date of the last finalized stored bar (the one before the latest, which may be partial)"""
+    return stored.index[-2] if len(stored) > 1 else stored.index[-1]
+
+
+def _adjustments_changed(stored: pd.DataFrame, tail: pd.DataFrame) -> bool:
+    """
+    Check whether a freshly downloaded tail is adjusted differently from the stored bars.
+
+    Bars come back auto-adjusted for splits, bonus issues and dividends as of
+    the download, so after a corporate action every earlier bar changes. The
+    tail starts at the last finalized stored bar: a changed close there, or a
+    split or dividend on a bar the store has not seen yet, means the stored
+    history is stale.
+    """
+    if tail is None or tail.empty:
+        return False
+
+    reference = _reference_date(stored)
+    if reference in tail.index and reference != stored.index[-1]:
+        if not np.isclose(tail['Close'].loc[reference], stored['Close'].loc[reference]):
+            return True
+
+    newer = tail[tail.index > stored.index[-1]]
+    actions = [column for column in ('Stock Splits', 'Dividends') if column in newer.columns]
+    return bool(actions) and bool((newer[actions].fillna(0) != 0).to_numpy().any())
+
+
+def _merge_bars(stored: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Combine stored and newly downloaded bars, preferring the new values"""
+    combined = pd.concat([stored, new])
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+@process_singleton
+def get_ohlcv_store() -> OHLCVStore:
+    """Get the process-wide OHLCV store instance"""
+    return OHLCVStore()
@@ -0,0 +1,509 @@
+"""
+Concurrent live quote fetching for StockScope
+Fetches quote batches in parallel under a per-symbol token-bucket rate limit, adapting batch size to latency and errors,
+and shares the latest quotes between sessions through a process-wide cache
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from utils.shared import process_singleton
+
+logger = logging.getLogger(__name__)
+
+# Yahoo Finance requests per second (one per symbol), and how many may be sent back to back;
+# the burst must cover the largest batch
+QUOTE_REQUESTS_PER_SECOND = 40.0
+QUOTE_BURST = 100
+
+# Batches in flight at once, and symbol requests in flight at once across them
+QUOTE_WORKERS = 4
+QUOTE_REQUEST_WORKERS = 16
+
+# Symbols per request: the first batch uses the initial size, later ones adapt within the bounds
+QUOTE_BATCH_SIZE = 10
+QUOTE_MIN_BATCH_SIZE = 1
+QUOTE_MAX_BATCH_SIZE = 50
+
+# A batch slower than this (seconds) shrinks the next ones
+QUOTE_TARGET_LATENCY = 2.0
+
+# Network timeout (seconds) of each download, so a hung request cannot hold up the cache
+QUOTE_TIMEOUT = 10
+
+# Individual attempts for symbols a batch did not return
+QUOTE_RETRIES = 2
+
+# Daily bars requested per symbol: today's bar for the quote and the one before for the previous close
+QUOTE_PERIOD = "2d"
+
+# Seconds a cached quote is served before it is fetched again
+QUOTE_TTL = 60
+
+# Age below which even an explicit refresh reuses the cached quote
+QUOTE_REFRESH_MIN_AGE = 15
+
+# Seconds a request waits for another session's fetch of the same symbols
+QUOTE_WAIT_TIMEOUT = 60
+
+# Seconds between background refreshes of the watched symbols (kept below QUOTE_TTL so pages hit the cache)
+QUOTE_POLL_INTERVAL = 30
+
+# Seconds a symbol stays watched after a page last asked for it
+QUOTE_WATCH_EXPIRY = 600
+
+# QuoteTable arrays, in constructor order
+QUOTE_COLUMNS = ('symbols', 'last', 'previous_close', 'high', 'low', 'volume', 'timestamp')
+
+
+class TokenBucket:
+    """Rate limiter: acquire(n) takes n tokens, waiting for a refill when fewer are left"""
+
+    def __init__(self, rate: float = QUOTE_REQUESTS_PER_SECOND, capacity: int = QUOTE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> None:
+        # More than the capacity could never be available at once
+        n = min(n, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveBatchSize:
+    """Batch size that grows while requests are fast and clean and halves when they are not.
+
+    Additive increase, multiplicative decrease: a batch that came back within
+    the target latency with every symbol grows the size by a few symbols; an
+    error, a slow response, or a batch missing more than half its symbols
+    halves it.
+    """
+
+    def __init__(self, initial: int = QUOTE_BATCH_SIZE, minimum: int = QUOTE_MIN_BATCH_SIZE,
+                 maximum: int = QUOTE_MAX_BATCH_SIZE, target_latency: float = QUOTE_TARGET_LATENCY):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.size = max(minimum, min(initial, maximum))
+        self._lock = threading.Lock()
+
+    def record(self, requested: int, returned: int, elapsed: float, error: bool = False) -> None:
+        with self._lock:
+            if error or elapsed > self.target_latency or returned * 2 < requested:
+                self.size = max(self.minimum, self.size // 2)
+            elif returned == requested:
+                self.size = min(self.maximum, self.size + 5)
+
+
+class QuoteTable:
+    """Latest quotes as parallel arrays, one row per symbol.
+
+    Columns: last price, previous close, day high, day low, day volume and
+    the time the quote was fetched (epoch seconds).
+    """
+
+    def __init__(self, symbols, last, previous_close, high, low, volume, timestamp):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.last = np.asarray(last, dtype=float)
+        self.previous_close = np.asarray(previous_close, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.volume = np.asarray(volume, dtype=np.int64)
+        self.timestamp = np.asarray(timestamp, dtype=float)
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def empty(cls) -> 'QuoteTable':
+        return cls(*([[]] * 7))
+
+    @classmethod
+    def concat(cls, tables: List['QuoteTable']) -> 'QuoteTable':
+        """Stack tables; a symbol in several keeps its row from the last one"""
+        tables = [table for table in tables if len(table)]
+        if not tables:
+            return cls.empty()
+        columns = [np.concatenate([getattr(table, name) for table in tables]) for name in QUOTE_COLUMNS]
+        _, first = np.unique(columns[0][::-1], return_index=True)
+        keep = np.sort(len(columns[0]) - 1 - first)
+        return cls(*(column[keep] for column in columns))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._rows
+
+    def fetched_at(self, symbol: str) -> Optional[float]:
+        """Fetch time of a symbol's quote, or None if the table has none"""
+        i = self._rows.get(symbol)
+        return None if i is None else self.timestamp[i]
+
+    def select(self, symbols: List[str]) -> 'QuoteTable':
+        """Rows of the given symbols that the table has, in the order given"""
+        rows = np.array([self._rows[symbol] for symbol in symbols if symbol in self._rows], dtype=np.intp)
+        return QuoteTable(*(getattr(self, name)[rows] for name in QUOTE_COLUMNS))
+
+    @property
+    def change(self) -> np.ndarray:
+        return self.last - self.previous_close
+
+    @property
+    def change_percent(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.change / self.previous_close * 100
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Quote dict of one symbol in the fetch_live_data format, or None"""
+        i = self._rows.get(symbol)
+        if i is None:
+            return None
+        return {
+            'current_price': self.last[i],
+            'previous_close': self.previous_close[i],
+            'high': self.high[i],
+            'low': self.low[i],
+            'volume': int(self.volume[i]),
+            'change': self.last[i] - self.previous_close[i],
+            'change_percent': self.change_percent[i],
+            'last_updated': datetime.fromtimestamp(self.timestamp[i]).strftime('%H:%M:%S')
+        }
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {symbol: self.get(symbol) for symbol in self.symbols}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Quotes as a DataFrame indexed by symbol, with change columns"""
+        return pd.DataFrame(
+            {
+                'last': self.last,
+                'previous_close': self.previous_close,
+                'high': self.high,
+                'low': self.low,
+                'volume': self.volume,
+                'timestamp': self.timestamp,
+                'change': self.change,
+                'change_percent': self.change_percent,
+            },
+            index=pd.Index(self.symbols, dtype=object, name='symbol')
+        )
+
+
+def _field(data: pd.DataFrame, name: str, symbols: List[str]) -> np.ndarray:
+    """One OHLCV field as a (bars, symbols) array, NaN for symbols not returned"""
+    if isinstance(data.columns, pd.MultiIndex):
+        if name not in data.columns.get_level_values(0):
+            # Downloaded grouped by ticker: (symbol, field) columns
+            data = data.swaplevel(axis=1)
+        field = data[name]
+    else:
+        field = data[[name]].set_axis(symbols[:1], axis=1)
+    return field.reindex(columns=symbols).to_numpy(dtype=float)
+
+
+def _quotes_from_download(data: Optional[pd.DataFrame], symbols: List[str], fetched_at: float) -> QuoteTable:
+    """
+    Latest quote per symbol from a few daily bars of several symbols.
+
+    `data` has (symbol, field) or (field, symbol) columns, as from
+    yf.download or pd.concat of per-symbol histories.
+
+    The last bar with a close is the latest (today's, while the market is
+    open) and the close of the bar before it is the previous close.
+    """
+    if data is None or data.empty:
+        return QuoteTable.empty()
+
+    close = _field(data, 'Close', symbols)
+    bars = np.arange(len(close))[:, None]
+    valid = ~np.isnan(close)
+    found = valid.any(axis=0)
+
+    last = len(close) - 1 - valid[::-1].argmax(axis=0)
+    earlier = valid & (bars < last)
+    previous = np.where(earlier.any(axis=0), len(close) - 1 - earlier[::-1].argmax(axis=0), last)
+
+    columns = np.flatnonzero(found)
+    last, previous = last[columns], previous[columns]
+    volume = _field(data, 'Volume', symbols)[last, columns]
+    return QuoteTable(
+        np.asarray(symbols, dtype=object)[columns],
+        close[last, columns],
+        close[previous, columns],
+        _field(data, 'High', symbols)[last, columns],
+        _field(data, 'Low', symbols)[last, columns],
+        np.nan_to_num(volume).astype(np.int64),
+        np.full(len(columns), fetched_at),
+    )
+
+
+class QuoteEngine:
+    """Fetches live quotes for many symbols with concurrent, rate-limited batches.
+
+    Every symbol is its own Ticker.history request, so quotes never wait on
+    the process-wide lock that multi-ticker history downloads take (see
+    utils.shared.download). Batches are cut from the symbol list as batch
+    slots free up, so each one uses the batch size learned from the batches
+    before it; a batch's latency is its slowest request, not counting time
+    queued behind other batches. Symbols a batch did not return (errors,
+    empty histories) are retried one by one afterwards instead of being
+    dropped with their batch.
+    """
+
+    def __init__(self, max_workers: int = QUOTE_WORKERS, request_workers: int = QUOTE_REQUEST_WORKERS,
+                 limiter: Optional[TokenBucket] = None, batch_size: Optional[AdaptiveBatchSize] = None,
+                 retries: int = QUOTE_RETRIES):
+        self.max_workers = max_workers
+        self.request_workers = request_workers
+        self.limiter = limiter or TokenBucket()
+        self.batch_size = batch_size or AdaptiveBatchSize()
+        self.retries = retries
+
+    def fetch(self, symbols: List[str], timeout: float = QUOTE_TIMEOUT) -> QuoteTable:
+        """
+        Fetch the latest quote of each symbol.
+
+        Args:
+            symbols (list): Yahoo Finance symbols
+            timeout (float): Network timeout per request
+
+        Returns:
+            QuoteTable: One row per symbol that returned data
+        """
+        pending = list(dict.fromkeys(symbols))
+        if not pending:
+            return QuoteTable.empty()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="quote-batches") as batches, \
+                ThreadPoolExecutor(max_workers=self.request_workers, thread_name_prefix="quotes") as requests:
+            quotes = self._run(batches, requests, pending, timeout, adaptive=True)
+
+            for _ in range(self.retries):
+                pending = [symbol for symbol in pending if symbol not in quotes]
+                if not pending:
+                    break
+                quotes = QuoteTable.concat([quotes, self._run(batches, requests, pending, timeout, adaptive=False)])
+
+        missing = sum(symbol not in quotes for symbol in pending)
+        if missing:
+            logger.warning(f"No live quote for {missing} symbol(s)")
+        return quotes
+
+    def _run(self, batches: ThreadPoolExecutor, requests: ThreadPoolExecutor, symbols: List[str],
+             timeout: float, adaptive: bool) -> QuoteTable:
+        """Fetch symbols in batches (adaptive size, or one symbol each), at most max_workers batches at a time"""
+        remaining = deque(symbols)
+        slots = threading.BoundedSemaphore(self.max_workers)
+        futures = []
+
+        while remaining:
+            slots.acquire()
+            size = self.batch_size.size if adaptive else 1
+            batch = [remaining.popleft() for _ in range(min(size, len(remaining)))]
+            self.limiter.acquire(len(batch))
+            future = batches.submit(self._fetch_batch, requests, batch, timeout, adaptive)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+        return QuoteTable.concat([future.result() for future in futures])
+
+    def _fetch_batch(self, requests: ThreadPoolExecutor, batch: List[str], timeout: float, adaptive: bool) -> QuoteTable:
+        results = list(requests.map(lambda symbol: self._fetch_symbol(symbol, timeout), batch))
+        frames = {symbol: data for symbol, (data, _, _) in zip(batch, results) if data is not None and not data.empty}
+        quotes = _quotes_from_download(pd.concat(frames, axis=1) if frames else None, batch, time.time())
+
+        if adaptive:
+            elapsed = max(elapsed for _, elapsed, _ in results)
+            self.batch_size.record(len(batch), len(quotes), elapsed, error=any(error for _, _, error in results))
+        return quotes
+
+    @staticmethod
+    def _fetch_symbol(symbol: str, timeout: float):
+        """(daily bars or None, seconds the request took, whether it raised) for one symbol"""
+        started = time.monotonic()
+        try:
+            # A couple of daily bars is all a quote needs, instead of a day of 1-minute bars
+            data = yf.Ticker(symbol).history(
+                period=QUOTE_PERIOD,
+                interval="1d",
+                auto_adjust=False,
+                actions=False,
+                timeout=timeout
+            )
+            return data, time.monotonic() - started, False
+        except Exception as e:
+            logger.error(f"Error fetching quote for {symbol}: {str(e)}")
+            return None, time.monotonic() - started, True
+
+
+class QuoteCache:
+    """Latest quotes shared by every session in the process.
+
+    get() serves quotes younger than the requested age from memory and
+    fetches only the stale or unknown symbols. A symbol already being fetched
+    for another session is not requested again; the caller waits for that
+    fetch instead, so any number of sessions watching the same symbols cost
+    one upstream request per symbol per TTL. Symbols that returned no quote
+    are remembered for the same time, so they are not retried on every call.
+    """
+
+    def __init__(self, engine: Optional[QuoteEngine] = None, ttl: float = QUOTE_TTL):
+        self.engine = engine or get_quote_engine()
+        self.ttl = ttl
+        self._quotes = QuoteTable.empty()
+        self._misses: Dict[str, float] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _age(self, symbol: str, now: float) -> float:
+        fetched_at = self._quotes.fetched_at(symbol)
+        if fetched_at is None:
+            fetched_at = self._misses.get(symbol)
+        return float('inf') if fetched_at is None else now - fetched_at
+
+    def get(self, symbols: List[str], max_age: Optional[float] = None, timeout: float = QUOTE_TIMEOUT) -> QuoteTable:
+        """
+        Quotes of the given symbols, refreshing those older than max_age.
+
+        Args:
+            symbols (list): Yahoo Finance symbols
+            max_age (float): Oldest acceptable quote in seconds (default: the cache TTL)
+            timeout (float): Network timeout per download request
+
+        Returns:
+            QuoteTable: Rows for the symbols that have a quote, in the order given
+        """
+        symbols = list(dict.fromkeys(symbols))
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+
+        claimed: List[str] = []
+        waiting = set()
+        with self._lock:
+            for symbol in symbols:
+                if self._age(symbol, now) <= max_age:
+                    continue
+                event = self._inflight.get(symbol)
+                if event is not None:
+                    waiting.add(event)
+                else:
+                    claimed.append(symbol)
+
+            if claimed:
+                done = threading.Event()
+                for symbol in claimed:
+                    self._inflight[symbol] = done
+
+        if claimed:
+            fetched = QuoteTable.empty()
+            try:
+                fetched = self.engine.fetch(claimed, timeout=timeout)
+            finally:
+                with self._lock:
+                    self._quotes = QuoteTable.concat([self._quotes, fetched])
+                    fetched_at = time.time()
+                    for symbol in claimed:
+                        if symbol in fetched:
+                            self._misses.pop(symbol, None)
+                        else:
+                            self._misses[symbol] = fetched_at
+                        del self._inflight[symbol]
+                done.set()
+
+        for event in waiting:
+            event.wait(timeout=QUOTE_WAIT_TIMEOUT)
+
+        with self._lock:
+            return self._quotes.select(symbols)
+
+
+class QuotePoller:
+    """Keeps the quote cache warm for symbols that pages are showing.
+
+    Pages call watch() with the symbols on screen; a daemon thread refreshes
+    every symbol watched within QUOTE_WATCH_EXPIRY each poll interval, so the
+    timed re-renders of those pages are served from memory.
+    """
+
+    def __init__(self, cache: Optional[QuoteCache] = None, interval: float = QUOTE_POLL_INTERVAL,
+                 expiry: float = QUOTE_WATCH_EXPIRY):
+        self.cache = cache or get_quote_cache()
+        self.interval = interval
+        self.expiry = expiry
+        self._watched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the poller thread (no-op if it is already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="quote-poller", daemon=True)
+            self._thread.start()
+
+    def watch(self, symbols: List[str]) -> None:
+        """Mark symbols as on screen; new ones are fetched right away"""
+        now = time.time()
+        with self._lock:
+            new = any(symbol not in self._watched for symbol in symbols)
+            self._watched.update(dict.fromkeys(symbols, now))
+        if new:
+            self._wake.set()
+
+    def watched(self) -> List[str]:
+        """Symbols watched within the expiry, dropping the others"""
+        cutoff = time.time() - self.expiry
+        with self._lock:
+            self._watched = {symbol: seen for symbol, seen in self._watched.items() if seen >= cutoff}
+            return list(self._watched)
+
+    def _loop(self) -> None:
+        while True:
+            symbols = self.watched()
+            if symbols:
+                try:
+                    self.cache.get(symbols, max_age=self.interval)
+                except Exception as e:
+                    logger.error(f"Quote poll failed: {str(e)}")
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+
+@process_singleton
+def get_quote_engine() -> QuoteEngine:
+    """Get the process-wide quote engine (its rate limit and batch size are shared by all callers)"""
+    return QuoteEngine()
+
+
+@process_singleton
+def get_quote_cache() -> QuoteCache:
+    """Get the process-wide quote cache"""
+    return QuoteCache()
+
+
+@process_singleton
+def get_quote_poller() -> QuotePoller:
+    """Get the process-wide quote poller, starting it on first use"""
+    poller = QuotePoller()
+    poller.start()
+    return poller
@@ -0,0 +1,251 @@
+"""
+Scheduled NSE 500 market report snapshots for StockScope
+Runs the scan on a background thread at configured times and stores timestamped report snapshots on disk
+"""
+
+import os
+import glob
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from utils.ohlcv_store import DATA_DIR
+from utils.nse500_analyzer import NSE500_STOCKS, iter_nse500_scan, rows_to_report
+from utils.shared import atomic_write, process_singleton
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_DIR = os.path.join(DATA_DIR, "reports")
+
+# Times of day (exchange time, comma separated HH:MM) at which a new snapshot is built.
+# The default runs once after the NSE close at 15:30.
+REPORT_TIMES = os.environ.get("STOCKSCOPE_REPORT_TIMES", "15:45")
+REPORT_TIMEZONE = ZoneInfo("Asia/Kolkata")
+
+# Number of snapshots kept on disk
+REPORT_RETENTION = 30
+
+SNAPSHOT_PREFIX = "market_report_"
+SNAPSHOT_TIME_FORMAT = "%Y%m%d_%H%M%S"
+SNAPSHOT_SUFFIX = ".parquet"
+
+
+def parse_report_times(spec: str) -> List[Tuple[int, int]]:
+    """Parse "15:45,09:00" into sorted (hour, minute) pairs"""
+    times = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            hour, minute = (int(value) for value in part.split(":"))
+        except ValueError:
+            logger.warning(f"Ignoring invalid report time: {part}")
+            continue
+        if 0 <= hour < 24 and 0 <= minute < 60:
+            times.append((hour, minute))
+    return sorted(set(times)) or [(15, 45)]
+
+
+def _scheduled_runs(now: datetime, times: List[Tuple[int, int]], days_back: int = 7) -> List[datetime]:
+    """Weekday run times from `days_back` days ago up to one week ahead, in order"""
+    runs = []
+    today = now.date()
+    for offset in range(-days_back, 8):
+        day = today + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for hour, minute in times:
+            runs.append(datetime(day.year, day.month, day.day, hour, minute, tzinfo=now.tzinfo))
+    return runs
+
+
+def last_scheduled_run(now: datetime, times: List[Tuple[int, int]]) -> Optional[datetime]:
+    """Most recent scheduled run time at or before `now`"""
+    past = [run for run in _scheduled_runs(now, times) if run <= now]
+    return past[-1] if past else None
+
+
+def next_scheduled_run(now: datetime, times: List[Tuple[int, int]]) -> datetime:
+    """First scheduled run time after `now`"""
+    return next(run for run in _scheduled_runs(now, times) if run > now)
+
+
+class ReportSnapshotStore:
+    """Timestamped report snapshots (one Parquet file per scan) in a directory"""
+
+    def __init__(self, root: Optional[str] = None, retention: int = REPORT_RETENTION):
+        self.root = root or DEFAULT_REPORT_DIR
+        self.retention = retention
+        self._lock = threading.Lock()
+        # Last snapshot read, so repeated page loads do not read it again
+        self._cached: Tuple[Optional[str], Optional[pd.DataFrame]] = (None, None)
+
+    def _paths(self) -> List[str]:
+        # The timestamp format sorts chronologically
+        return sorted(glob.glob(os.path.join(self.root, f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")))
+
+    @staticmethod
+    def _timestamp(path: str) -> datetime:
+        stamp = os.path.basename(path)[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]
+        return datetime.strptime(stamp, SNAPSHOT_TIME_FORMAT).replace(tzinfo=REPORT_TIMEZONE)
+
+    def save(self, report: Optional[pd.DataFrame], created_at: Optional[datetime] = None) -> str:
+        """Write a snapshot (an empty frame when no stock crossed) and prune old ones"""
+        created_at = created_at or datetime.now(REPORT_TIMEZONE)
+        report = report if report is not None else pd.DataFrame()
+        path = os.path.join(self.root, f"{SNAPSHOT_PREFIX}{created_at.strftime(SNAPSHOT_TIME_FORMAT)}{SNAPSHOT_SUFFIX}")
+
+        with self._lock:
+            atomic_write(path, report.to_parquet)
+
+            for old_path in self._paths()[:-self.retention]:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        return path
+
+    def latest_time(self) -> Optional[datetime]:
+        """Creation time of the newest snapshot, or None"""
+        paths = self._paths()
+        return self._timestamp(paths[-1]) if paths else None
+
+    def load_latest(self) -> Tuple[Optional[pd.DataFrame], Optional[datetime]]:
+        """
+        Read the newest snapshot.
+
+        Returns:
+            tuple: (report DataFrame, creation time), or (None, None) if no snapshot exists
+        """
+        paths = self._paths()
+        if not paths:
+            return None, None
+
+        path = paths[-1]
+        cached_path, cached_report = self._cached
+        if cached_path == path:
+            return cached_report, self._timestamp(path)
+
+        try:
+            report = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"Could not read report snapshot {path}: {str(e)}")
+            return None, None
+
+        self._cached = (path, report)
+        return report, self._timestamp(path)
+
+
+class ReportScheduler:
+    """Builds report snapshots on a daemon thread at the configured times.
+
+    On start a snapshot is built right away if the newest one predates the
+    last scheduled run (or none exists), so a restarted app catches up.
+    While a scan runs, the rows found so far are available from
+    partial_report() so pages can show them before the snapshot is written.
+    """
+
+    def __init__(self, store: Optional[ReportSnapshotStore] = None, times: Optional[str] = None):
+        self.store = store or ReportSnapshotStore()
+        self.times = parse_report_times(times if times is not None else REPORT_TIMES)
+        self._wake = threading.Event()
+        self._run_requested = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        self.last_error: Optional[str] = None
+        self._partial_rows: List[dict] = []
+        self.progress: Tuple[int, int] = (0, 0)
+
+    def start(self) -> None:
+        """Start the scheduler thread (no-op if it is already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="report-scheduler", daemon=True)
+            self._thread.start()
+
+    def run_now(self) -> None:
+        """Ask the scheduler thread to build a snapshot as soon as possible"""
+        with self._lock:
+            self._run_requested = True
+        self._wake.set()
+
+    @property
+    def busy(self) -> bool:
+        """True while a scan is running or an immediate one has been requested"""
+        return self.running or self._run_requested
+
+    def partial_report(self) -> Optional[pd.DataFrame]:
+        """Rows found so far by the running scan (see rows_to_report)"""
+        with self._lock:
+            rows = list(self._partial_rows)
+        return rows_to_report(rows)
+
+    def next_run(self) -> datetime:
+        return next_scheduled_run(datetime.now(REPORT_TIMEZONE), self.times)
+
+    def _due(self) -> bool:
+        latest = self.store.latest_time()
+        last_run = last_scheduled_run(datetime.now(REPORT_TIMEZONE), self.times)
+        scheduled = latest is None or (last_run is not None and latest < last_run)
+
+        with self._lock:
+            if self._run_requested or scheduled:
+                # Mark as running before clearing the request so `busy` never flickers
+                self.running = True
+                self._run_requested = False
+                return True
+        return False
+
+    def _loop(self) -> None:
+        while True:
+            if self._due():
+                if not self._build_snapshot():
+                    # Do not retry in a tight loop; the next scheduled time or run_now() tries again
+                    self._wake.wait(timeout=300)
+                    self._wake.clear()
+                continue
+
+            wait_seconds = (self.next_run() - datetime.now(REPORT_TIMEZONE)).total_seconds()
+            self._wake.wait(timeout=max(1.0, min(wait_seconds, 3600)))
+            self._wake.clear()
+
+    def _build_snapshot(self) -> bool:
+        total = len(dict.fromkeys(NSE500_STOCKS))
+        with self._lock:
+            self._partial_rows = []
+            self.progress = (0, total)
+
+        try:
+            for done, (_, row) in enumerate(iter_nse500_scan(), 1):
+                with self._lock:
+                    if row is not None:
+                        self._partial_rows.append(row)
+                    self.progress = (min(done, total), total)
+
+            with self._lock:
+                rows = list(self._partial_rows)
+            path = self.store.save(rows_to_report(rows))
+            self.last_error = None
+            logger.info(f"Saved market report snapshot {path}")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Market report scan failed: {str(e)}")
+            return False
+        finally:
+            self.running = False
+
+
+@process_singleton
+def get_report_scheduler() -> ReportScheduler:
+    """Get the process-wide report scheduler, starting it on first use"""
+    scheduler = ReportScheduler()
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,294 @@
+"""
+Carried rolling state for incremental NSE 500 scans
+Keeps running MA50/MA200 sums, RSI gain/loss sums and recent cross flags per symbol so new bars update in O(1)
+"""
+
+import os
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.ohlcv_store import DATA_DIR, period_start
+from utils.shared import atomic_write, process_singleton
+
+logger = logging.getLogger(__name__)
+
+SHORT_WINDOW = 50
+LONG_WINDOW = 200
+RSI_PERIOD = 14
+# Bars kept for divergence detection (detect_divergence needs at least 50)
+DIVERGENCE_BARS = 50
+
+
+class SymbolScanState:
+    """Rolling indicator state for one symbol.
+
+    append() adds one daily bar in constant time by adding the new close to the
+    running sums and subtracting the one leaving each window. The values match
+    a full recompute over the one-year history the scan uses: MA50/MA200 and
+    RSI only depend on their trailing windows, and the bars inside the 1y
+    window are kept separately for ROI.
+    """
+
+    def __init__(self, days: int = 7):
+        self.days = days
+        self.count = 0
+        self.last_date = None
+        self.closes = deque(maxlen=LONG_WINDOW)
+        self.sum_short = 0.0
+        self.sum_long = 0.0
+        self.gains = deque(maxlen=RSI_PERIOD)
+        self.losses = deque(maxlen=RSI_PERIOD)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.rsi_values = deque(maxlen=DIVERGENCE_BARS)
+        self.prev_ma = (np.nan, np.nan)
+        self.last_ma = (np.nan, np.nan)
+        # (date, close, cross type or None) for the last `days` bars
+        self.crosses = deque(maxlen=days)
+        # (date, close) for the bars inside the one-year window
+        self.year_bars = deque()
+
+    @classmethod
+    def from_history(cls, data: pd.DataFrame, days: int = 7) -> 'SymbolScanState':
+        """Build the state by replaying a daily history"""
+        state = cls(days=days)
+        for date, close in zip(data.index, data['Close'].to_numpy(dtype=float)):
+            state.append(date, close)
+        return state
+
+    def to_record(self) -> Dict:
+        """The state as plain values for ScanStateStore (dates as epoch nanoseconds plus one timezone)"""
+        tz = pd.Timestamp(self.last_date).tz
+        return {
+            'days': self.days,
+            'count': self.count,
+            'tz': str(tz) if tz is not None else '',
+            'last_date': pd.Timestamp(self.last_date).value,
+            'closes': list(self.closes),
+            'sum_short': self.sum_short,
+            'sum_long': self.sum_long,
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'gain_sum': self.gain_sum,
+            'loss_sum': self.loss_sum,
+            'rsi_values': list(self.rsi_values),
+            'prev_ma': list(self.prev_ma),
+            'last_ma': list(self.last_ma),
+            'cross_dates': [pd.Timestamp(date).value for date, _, _ in self.crosses],
+            'cross_closes': [close for _, close, _ in self.crosses],
+            'cross_types': [cross_type for _, _, cross_type in self.crosses],
+            'year_dates': [pd.Timestamp(date).value for date, _ in self.year_bars],
+            'year_closes': [close for _, close in self.year_bars],
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict) -> 'SymbolScanState':
+        """Rebuild a state written by to_record"""
+        tz = record['tz'] or None
+
+        def dates(values) -> List[pd.Timestamp]:
+            index = pd.to_datetime(np.asarray(values, dtype=np.int64), unit='ns', utc=tz is not None)
+            return list(index.tz_convert(tz) if tz is not None else index)
+
+        def floats(values) -> List[float]:
+            return np.asarray(values, dtype=float).tolist()
+
+        state = cls(days=int(record['days']))
+        state.count = int(record['count'])
+        state.last_date = dates([record['last_date']])[0]
+        state.closes.extend(floats(record['closes']))
+        state.sum_short = float(record['sum_short'])
+        state.sum_long = float(record['sum_long'])
+        state.gains.extend(floats(record['gains']))
+        state.losses.extend(floats(record['losses']))
+        state.gain_sum = float(record['gain_sum'])
+        state.loss_sum = float(record['loss_sum'])
+        state.rsi_values.extend(floats(record['rsi_values']))
+        state.prev_ma = tuple(floats(record['prev_ma']))
+        state.last_ma = tuple(floats(record['last_ma']))
+        state.crosses.extend(zip(dates(record['cross_dates']), floats(record['cross_closes']), list(record['cross_types'])))
+        state.year_bars.extend(zip(dates(record['year_dates']), floats(record['year_closes'])))
+        return state
+
+    def append(self, date, close: float) -> None:
+        """Add the next daily bar"""
+        prev_close = self.closes[-1] if self.closes else None
+
+        # Moving average sums
+        if len(self.closes) >= SHORT_WINDOW:
+            self.sum_short -= self.closes[-SHORT_WINDOW]
+        if len(self.closes) == LONG_WINDOW:
+            self.sum_long -= self.closes[0]
+        self.closes.append(close)
+        self.sum_short += close
+        self.sum_long += close
+
+        # RSI sums; the first bar counts as a zero change like the pandas version
+        delta = close - prev_close if prev_close is not None else 0.0
+        if len(self.gains) == RSI_PERIOD:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+        self.gains.append(max(delta, 0.0))
+        self.losses.append(max(-delta, 0.0))
+        self.gain_sum += self.gains[-1]
+        self.loss_sum += self.losses[-1]
+
+        self.count += 1
+        self.rsi_values.append(self._rsi())
+        self.prev_ma = self.last_ma
+        self.last_ma = self._moving_averages()
+        self.crosses.append((date, close, self._cross_type()))
+
+        self.year_bars.append((date, close))
+        self._trim_year(date)
+        self.last_date = date
+
+    def replace_last(self, close: float) -> None:
+        """Replace the close of the latest bar (e.g. a partial intraday bar that was revised)"""
+        old_close = self.closes[-1]
+        change = close - old_close
+        self.closes[-1] = close
+        self.sum_short += change
+        self.sum_long += change
+
+        if self.count > 1:
+            prev_close = self.closes[-2]
+            delta = close - prev_close
+            self.gain_sum += max(delta, 0.0) - self.gains[-1]
+            self.loss_sum += max(-delta, 0.0) - self.losses[-1]
+            self.gains[-1] = max(delta, 0.0)
+            self.losses[-1] = max(-delta, 0.0)
+
+        self.rsi_values[-1] = self._rsi()
+        self.last_ma = self._moving_averages()
+        date = self.crosses[-1][0]
+        self.crosses[-1] = (date, close, self._cross_type())
+        self.year_bars[-1] = (date, close)
+
+    def update_from(self, data: pd.DataFrame) -> bool:
+        """
+        Apply the bars of `data` that are newer than the state.
+
+        Returns:
+            bool: False if the history no longer agrees with the state (gap,
+            re-adjusted prices), in which case the state must be rebuilt
+        """
+        if self.last_date is None or self.last_date not in data.index:
+            return False
+
+        closes = data['Close']
+        # A finalized bar that changed means the history was re-adjusted
+        if self.count > 1 and len(self.year_bars) > 1:
+            prev_date, prev_close = self.year_bars[-2]
+            if prev_date not in data.index or not np.isclose(closes.loc[prev_date], prev_close):
+                return False
+
+        latest_close = float(closes.loc[self.last_date])
+        if latest_close != self.closes[-1]:
+            self.replace_last(latest_close)
+
+        newer = closes[closes.index > self.last_date]
+        for date, close in zip(newer.index, newer.to_numpy(dtype=float)):
+            self.append(date, close)
+
+        # ROI is measured from the first bar of the history the scan was given
+        while len(self.year_bars) > 1 and self.year_bars[0][0] < data.index[0]:
+            self.year_bars.popleft()
+        return True
+
+    def _trim_year(self, now) -> None:
+        start = period_start('1y', pd.Timestamp(now))
+        while self.year_bars and self.year_bars[0][0] < start:
+            self.year_bars.popleft()
+
+    def _moving_averages(self):
+        ma_short = self.sum_short / SHORT_WINDOW if self.count >= SHORT_WINDOW else np.nan
+        ma_long = self.sum_long / LONG_WINDOW if self.count >= LONG_WINDOW else np.nan
+        return ma_short, ma_long
+
+    def _rsi(self) -> float:
+        if self.count < RSI_PERIOD:
+            return np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(self.gain_sum / RSI_PERIOD) / np.float64(self.loss_sum / RSI_PERIOD)
+            return float(100 - (100 / (1 + rs)))
+
+    def _cross_type(self) -> Optional[str]:
+        (ma_short, ma_long), (prev_short, prev_long) = self.last_ma, self.prev_ma
+        if ma_short > ma_long and prev_short <= prev_long:
+            return 'Golden Cross'
+        if ma_short < ma_long and prev_short >= prev_long:
+            return 'Death Cross'
+        return None
+
+    @property
+    def bars_in_year(self) -> int:
+        """Number of bars in the one-year window (the scan needs 200)"""
+        return len(self.year_bars)
+
+    @property
+    def current_price(self) -> float:
+        return self.closes[-1]
+
+    @property
+    def rsi(self) -> float:
+        return self.rsi_values[-1]
+
+    @property
+    def roi(self) -> float:
+        """Return over the one-year window in percent"""
+        first_close = self.year_bars[0][1]
+        return ((self.current_price - first_close) / first_close) * 100
+
+    def recent_cross(self):
+        """Latest Golden (preferred) or Death cross among the last `days` bars, like detect_recent_cross"""
+        for wanted in ('Golden Cross', 'Death Cross'):
+            for date, close, cross_type in reversed(self.crosses):
+                if cross_type == wanted:
+                    return cross_type, date, close
+        return None, None, None
+
+    def divergence_frame(self):
+        """Last DIVERGENCE_BARS closes and RSI values, enough for detect_divergence"""
+        bars = min(len(self.rsi_values), len(self.closes))
+        closes = list(self.closes)[-bars:]
+        frame = pd.DataFrame({'Close': closes})
+        return frame, pd.Series(list(self.rsi_values)[-bars:])
+
+
+class ScanStateStore:
+    """Persists SymbolScanState objects between scans (DATA_DIR/scan_state.parquet, one row per symbol)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(DATA_DIR, 'scan_state.parquet')
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, SymbolScanState]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            records = pd.read_parquet(self.path).to_dict('index')
+            return {symbol: SymbolScanState.from_record(record) for symbol, record in records.items()}
+        except Exception as e:
+            logger.warning(f"Discarding unreadable scan state: {str(e)}")
+            return {}
+
+    def save(self, states: Dict[str, SymbolScanState]) -> None:
+        records = {symbol: state.to_record() for symbol, state in states.items() if state.last_date is not None}
+        frame = pd.DataFrame.from_dict(records, orient='index')
+        with self._lock:
+            try:
+                atomic_write(self.path, frame.to_parquet)
+            except Exception as e:
+                logger.warning(f"Could not write scan state: {str(e)}")
+
+
+@process_singleton
+def get_scan_state_store() -> ScanStateStore:
+    """Get the process-wide scan state store instance"""
+    return ScanStateStore()
@@ -0,0 +1,243 @@
+"""
+Security master for StockScope
+Single source of symbols, names and sectors: the bundled NSE 500 CSV plus a few extra listings,
+loaded once into array columns with hash indexes on symbol and Yahoo symbol and an inverted sector index
+"""
+
+import os
+import csv
+import glob
+import logging
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from utils.shared import process_singleton
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "attached_assets")
+NSE500_CSV_PATTERN = "nse500_symbols_*.csv"
+
+# Listings searchable in the app that are not part of the NSE 500 file
+EXTRA_SECURITIES = [
+    {"symbol": "LTI", "name": "L&T Infotech Limited", "sector": "Information Technology", "yahoo_symbol": "LTI.NS"},
+    {"symbol": "HPCL", "name": "Hindustan Petroleum", "sector": "Oil Gas & Consumable Fuels", "yahoo_symbol": "HPCL.NS"},
+    {"symbol": "TATAMOTORS", "name": "Tata Motors Limited", "sector": "Automobile and Auto Components", "yahoo_symbol": "TATAMOTORS.NS"},
+    {"symbol": "SPICEJET", "name": "SpiceJet Limited", "sector": "Services", "yahoo_symbol": "SPICEJET.NS"},
+]
+
+# Watchlist identification profiles keyed by Yahoo symbol: (category, market cap class, typical price range).
+# The category is the short industry label matched against the "Industry" column of watchlist sheets.
+WATCHLIST_PROFILES = {
+    # Large Cap Stocks
+    "RELIANCE.NS": ("Oil & Gas", "LC", (2000, 3000)),
+    "TCS.NS": ("IT", "LC", (3000, 4500)),
+    "HDFCBANK.NS": ("Banking", "LC", (1400, 1800)),
+    "ICICIBANK.NS": ("Banking", "LC", (1000, 1400)),
+    "INFY.NS": ("IT", "LC", (1400, 2000)),
+    "HINDUNILVR.NS": ("FMCG", "LC", (2200, 2800)),
+    "LT.NS": ("Construction", "LC", (3000, 4000)),
+    "SBIN.NS": ("Banking", "LC", (600, 900)),
+    "BHARTIARTL.NS": ("Telecom", "LC", (1000, 1400)),
+    "KOTAKBANK.NS": ("Banking", "LC", (1600, 2000)),
+    "ASIANPAINT.NS": ("Paints", "LC", (2800, 3600)),
+    "ITC.NS": ("FMCG", "LC", (400, 500)),
+    "AXISBANK.NS": ("Banking", "LC", (1000, 1300)),
+    "MARUTI.NS": ("Auto", "LC", (9000, 12000)),
+    "SUNPHARMA.NS": ("Pharma", "LC", (1400, 1800)),
+    "ULTRACEMCO.NS": ("Cement", "LC", (9000, 12000)),
+    "TITAN.NS": ("Jewellery", "LC", (3000, 4000)),
+    "NESTLEIND.NS": ("FMCG", "LC", (20000, 25000)),
+    "BAJFINANCE.NS": ("NBFC", "LC", (6000, 8000)),
+    "WIPRO.NS": ("IT", "LC", (400, 600)),
+
+    # Mid Cap Stocks
+    "ADANIGREEN.NS": ("Power", "MC", (1000, 2000)),
+    "ADANIPORTS.NS": ("Infrastructure", "LC", (700, 1000)),
+    "BAJAJFINSV.NS": ("Financial Services", "LC", (1500, 2000)),
+    "BAJAJ-AUTO.NS": ("Auto", "MC", (8000, 10000)),
+    "CIPLA.NS": ("Pharma", "MC", (1300, 1700)),
+    "COALINDIA.NS": ("Mining", "LC", (300, 500)),
+    "DRREDDY.NS": ("Pharma", "MC", (5000, 7000)),
+    "EICHERMOT.NS": ("Auto", "MC", (4000, 5000)),
+    "GRASIM.NS": ("Chemicals", "MC", (2000, 2500)),
+    "HCLTECH.NS": ("IT", "LC", (1200, 1600)),
+    "HEROMOTOCO.NS": ("Auto", "MC", (4000, 5000)),
+    "HINDALCO.NS": ("Metals", "MC", (400, 600)),
+    "INDUSINDBK.NS": ("Banking", "MC", (1000, 1400)),
+    "JSWSTEEL.NS": ("Steel", "MC", (800, 1000)),
+    "ONGC.NS": ("Oil & Gas", "LC", (200, 300)),
+    "POWERGRID.NS": ("Power", "LC", (200, 300)),
+    "TATAMOTORS.NS": ("Auto", "MC", (700, 1000)),
+    "TATASTEEL.NS": ("Steel", "MC", (100, 200)),
+    "TECHM.NS": ("IT", "MC", (1400, 1800)),
+    "VEDL.NS": ("Metals", "MC", (400, 600)),
+
+    # Small Cap and Specialized Stocks
+    "ADANIENT.NS": ("Infrastructure", "LC", (2000, 3000)),
+    "APOLLOHOSP.NS": ("Healthcare", "MC", (5000, 7000)),
+    "BPCL.NS": ("Oil & Gas", "MC", (300, 400)),
+    "BRITANNIA.NS": ("FMCG", "MC", (4500, 5500)),
+    "DIVISLAB.NS": ("Pharma", "MC", (3500, 4500)),
+    "GODREJCP.NS": ("FMCG", "MC", (1000, 1300)),
+    "HDFCLIFE.NS": ("Insurance", "MC", (600, 800)),
+    "IOC.NS": ("Oil & Gas", "MC", (100, 200)),
+    "LTIM.NS": ("IT", "MC", (5000, 6000)),
+    "M&M.NS": ("Auto", "MC", (2500, 3000)),
+    "PIDILITIND.NS": ("Chemicals", "MC", (2500, 3000)),
+    "SBILIFE.NS": ("Insurance", "MC", (1200, 1600)),
+    "TATACONSUM.NS": ("FMCG", "MC", (900, 1200)),
+
+    # Banking and Financial Services
+    "BANDHANBNK.NS": ("Banking", "SC", (200, 300)),
+    "FEDERALBNK.NS": ("Banking", "SC", (100, 200)),
+    "IDFCFIRSTB.NS": ("Banking", "SC", (60, 100)),
+    "PNB.NS": ("Banking", "MC", (80, 120)),
+    "CANBK.NS": ("Banking", "MC", (100, 150)),
+
+    # IT and Technology
+    "MPHASIS.NS": ("IT", "SC", (2500, 3000)),
+    "PERSISTENT.NS": ("IT", "SC", (4000, 5000)),
+    "COFORGE.NS": ("IT", "SC", (6000, 8000)),
+
+    # Pharma and Healthcare
+    "BIOCON.NS": ("Pharma", "SC", (300, 400)),
+    "LUPIN.NS": ("Pharma", "SC", (1000, 1500)),
+    "TORNTPHARM.NS": ("Pharma", "MC", (2000, 3000)),
+}
+
+
+def _nse500_csv_path() -> Optional[str]:
+    """Newest bundled NSE 500 symbols file"""
+    paths = sorted(glob.glob(os.path.join(ASSETS_DIR, NSE500_CSV_PATTERN)))
+    return paths[-1] if paths else None
+
+
+class SecurityMaster:
+    """All known securities as parallel array columns.
+
+    Row i describes one listing: symbols[i], yahoo_symbols[i], names[i],
+    sectors[i] (an index into sector_names), exchanges[i] and in_nse500[i].
+    Watchlist profiles fill categories, mcaps and price_low/price_high for the
+    rows that have one (None/NaN otherwise). Lookups go through dict indexes:
+    symbol -> row, Yahoo symbol -> row and sector -> member rows.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], nse500_count: int,
+                 profiles: Optional[Dict[str, tuple]] = None):
+        profiles = profiles if profiles is not None else WATCHLIST_PROFILES
+        n = len(rows)
+
+        self.symbols = np.array([row["symbol"] for row in rows], dtype=object)
+        self.yahoo_symbols = np.array([row["yahoo_symbol"] for row in rows], dtype=object)
+        self.names = np.array([row["name"] for row in rows], dtype=object)
+        self.exchanges = np.array([row.get("exchange", "NSE") for row in rows], dtype=object)
+        self.in_nse500 = np.arange(n) < nse500_count
+
+        # Sectors are stored as codes into a sorted list of sector names
+        self.sector_names = sorted({row["sector"] for row in rows})
+        sector_codes = {sector: code for code, sector in enumerate(self.sector_names)}
+        self.sectors = np.array([sector_codes[row["sector"]] for row in rows], dtype=np.int16)
+
+        self.categories = np.full(n, None, dtype=object)
+        self.mcaps = np.full(n, None, dtype=object)
+        self.price_low = np.full(n, np.nan)
+        self.price_high = np.full(n, np.nan)
+
+        # Hash indexes (first listing wins on duplicates)
+        self._by_symbol: Dict[str, int] = {}
+        self._by_yahoo: Dict[str, int] = {}
+        for i in range(n):
+            self._by_symbol.setdefault(self.symbols[i], i)
+            self._by_yahoo.setdefault(self.yahoo_symbols[i], i)
+
+        profiled = []
+        for yahoo_symbol, (category, mcap, (low, high)) in profiles.items():
+            i = self._by_yahoo.get(yahoo_symbol)
+            if i is None:
+                logger.warning(f"Watchlist profile for unknown security {yahoo_symbol}")
+                continue
+            profiled.append(i)
+            self.categories[i] = category
+            self.mcaps[i] = mcap
+            self.price_low[i] = low
+            self.price_high[i] = high
+        self._profiled = np.array(profiled, dtype=np.intp)
+
+        # Inverted index: sector name -> member rows in listing order
+        self._by_sector: Dict[str, np.ndarray] = {
+            sector: np.flatnonzero(self.sectors == code) for code, sector in enumerate(self.sector_names)
+        }
+
+    @classmethod
+    def load(cls, csv_path: Optional[str] = None, extras: Optional[List[Dict[str, str]]] = None) -> 'SecurityMaster':
+        """Build the master from the NSE 500 CSV followed by the extra listings"""
+        csv_path = csv_path or _nse500_csv_path()
+        extras = EXTRA_SECURITIES if extras is None else extras
+
+        rows = []
+        if csv_path:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                for record in csv.DictReader(f):
+                    rows.append({
+                        "symbol": record["Symbol"].strip(),
+                        "name": record["name"].strip(),
+                        "sector": record["sector"].strip(),
+                        "yahoo_symbol": record["yahoo_symbol"].strip(),
+                    })
+        else:
+            logger.error(f"NSE 500 symbols file not found in {ASSETS_DIR}")
+
+        nse500_count = len(rows)
+        known = {row["yahoo_symbol"] for row in rows}
+        rows += [row for row in extras if row["yahoo_symbol"] not in known]
+        return cls(rows, nse500_count)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def record(self, i: int) -> Dict:
+        """Row i as a dict (symbol, yahoo_symbol, name, sector, exchange)"""
+        return {
+            "symbol": self.symbols[i],
+            "yahoo_symbol": self.yahoo_symbols[i],
+            "name": self.names[i],
+            "sector": self.sector_names[self.sectors[i]],
+            "exchange": self.exchanges[i],
+        }
+
+    def records(self, rows=None) -> Iterator[Dict]:
+        """Records for the given rows (all rows by default), in order"""
+        for i in (range(len(self)) if rows is None else rows):
+            yield self.record(i)
+
+    def row_for_symbol(self, symbol: str) -> Optional[int]:
+        return self._by_symbol.get(symbol)
+
+    def row_for_yahoo(self, yahoo_symbol: str) -> Optional[int]:
+        return self._by_yahoo.get(yahoo_symbol)
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Record for an exchange symbol ("TCS") or Yahoo symbol ("TCS.NS"), or None"""
+        i = self._by_symbol.get(symbol)
+        if i is None:
+            i = self._by_yahoo.get(symbol)
+        return self.record(i) if i is not None else None
+
+    def sector_rows(self, sector: str) -> np.ndarray:
+        """Rows of a sector (exact name), empty if unknown"""
+        return self._by_sector.get(sector, np.empty(0, dtype=np.intp))
+
+    def nse500_yahoo_symbols(self) -> List[str]:
+        """Yahoo symbols of the NSE 500 constituents in file order"""
+        return list(self.yahoo_symbols[self.in_nse500])
+
+    def profiled_rows(self) -> np.ndarray:
+        """Rows that have a watchlist identification profile, in WATCHLIST_PROFILES order"""
+        return self._profiled
+
+
+@process_singleton
+def get_security_master() -> SecurityMaster:
+    """Get the process-wide security master, loading it on first use"""
+    return SecurityMaster.load()
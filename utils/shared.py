@@ -0,0 +1,86 @@
+"""
+Shared helpers for StockScope's data modules
+Atomic file writes for the on-disk stores, lazily created process-wide instances
+and the one entry point for yfinance multi-ticker downloads
+"""
+
+import os
+import json
+import threading
+from functools import wraps
+from typing import Any, Callable, TypeVar
+
+import pandas as pd
+import yfinance as yf
+
+T = TypeVar('T')
+
+# yf.download keeps its results and errors in module-level dicts that every call resets,
+# so two downloads running at once corrupt each other's output
+_DOWNLOAD_LOCK = threading.Lock()
+
+
+def atomic_write(path: str, write: Callable[[str], None]) -> None:
+    """
+    Write a file so concurrent readers never see it half written.
+
+    `write` is called with a temporary path next to `path`, and the finished
+    file then replaces `path` with one os.replace. If writing fails the
+    temporary file is removed and the error re-raised.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: str, obj: Any) -> None:
+    """Write an object as JSON to `path` atomically"""
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, 'w') as f:
+            json.dump(obj, f)
+    atomic_write(path, write)
+
+
+def process_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Turn a zero-argument factory into a get-or-create function.
+
+    The first call runs the factory under a lock; every later call, from any
+    thread or Streamlit session, returns the same instance.
+    """
+    instance = None
+    lock = threading.Lock()
+
+    @wraps(factory)
+    def get() -> T:
+        nonlocal instance
+        with lock:
+            if instance is None:
+                instance = factory()
+            return instance
+
+    return get
+
+
+def download(tickers, **kwargs) -> pd.DataFrame:
+    """
+    yf.download, one call at a time across the process.
+
+    Every multi-ticker download in StockScope goes through here. A single
+    call still fetches its tickers in parallel when given threads=True.
+    Live quotes use per-symbol Ticker.history requests instead, so they do
+    not wait behind long history batches.
+    """
+    with _DOWNLOAD_LOCK:
+        return yf.download(tickers, **kwargs)
@@ -1,13 +1,82 @@
-import yfinance as yf
 import pandas as pd
 import streamlit as st
+import os
+import json
+import time
+import threading
 from datetime import datetime, timedelta
+from utils.ohlcv_store import DATA_DIR, get_ohlcv_store, slice_period
+from utils.fundamentals_store import get_fundamentals_store
+from utils.shared import write_json
+
+# Seconds a symbol that resolved to nothing is remembered before it is tried again
+NEGATIVE_CACHE_TTL = 6 * 3600
+
+class SymbolSuffixCache:
+    """Persistent map of base symbol to its working Yahoo Finance symbol.
+    
+    Also remembers, for NEGATIVE_CACHE_TTL seconds, base symbols for which no
+    variation returned any data so repeat lookups do not hit the network.
+    """
+    
+    def __init__(self, path=None, negative_ttl=NEGATIVE_CACHE_TTL):
+        self.path = path or os.path.join(DATA_DIR, 'symbol_suffixes.json')
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self.resolved = {}
+        self.unresolved = {}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            self.resolved = cached.get('resolved', {})
+            self.unresolved = cached.get('unresolved', {})
+        except (OSError, ValueError):
+            pass
+    
+    def _save(self):
+        try:
+            write_json(self.path, {'resolved': self.resolved, 'unresolved': self.unresolved})
+        except OSError:
+            pass
+    
+    def get_resolved(self, base_symbol):
+        """Return the cached working symbol (e.g. RELIANCE.NS) or None"""
+        return self.resolved.get(base_symbol)
+    
+    def is_unresolvable(self, base_symbol):
+        """True if the symbol recently resolved to nothing"""
+        failed_at = self.unresolved.get(base_symbol)
+        return failed_at is not None and time.time() - failed_at < self.negative_ttl
+    
+    def set_resolved(self, base_symbol, symbol):
+        with self._lock:
+            self.unresolved.pop(base_symbol, None)
+            if self.resolved.get(base_symbol) != symbol:
+                self.resolved[base_symbol] = symbol
+                self._save()
+    
+    def set_unresolvable(self, base_symbol):
+        with self._lock:
+            self.resolved.pop(base_symbol, None)
+            self.unresolved[base_symbol] = time.time()
+            self._save()
+    
+    def forget(self, base_symbol):
+        """Drop a cached resolution that stopped working"""
+        with self._lock:
+            if self.resolved.pop(base_symbol, None) is not None:
+                self._save()
 
 class StockDataFetcher:
     """Class to handle stock data fetching from Yahoo Finance for Indian stocks."""
     
     def __init__(self):
         self.session = None
+        self.store = get_ohlcv_store()
+        self.suffix_cache = SymbolSuffixCache()
     
     def _try_symbol_variations(self, base_symbol, period="6mo"):
         """
@@ -21,6 +90,10 @@ class StockDataFetcher:
         if base_symbol.endswith('.NS') or base_symbol.endswith('.BO'):
             base_symbol = base_symbol[:-3]
         
+        # Symbols that recently resolved to nothing are not retried until the TTL expires
+        if self.suffix_cache.is_unresolvable(base_symbol):
+            return None, None
+        
         # Try different variations in order of preference
         variations = [
             f"{base_symbol}.NS",  # NSE first (most common)
@@ -28,17 +101,40 @@ class StockDataFetcher:
             base_symbol,          # Sometimes works without suffix
         ]
         
+        # A previously working variation is tried first, usually the only request needed
+        resolved_symbol = self.suffix_cache.get_resolved(base_symbol)
+        if resolved_symbol in variations:
+            variations.remove(resolved_symbol)
+            variations.insert(0, resolved_symbol)
+        
+        found_any_data = False
+        had_error = False
+        resolved_returned_nothing = False
         for symbol in variations:
             try:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period)
+                data = self.store.get_history(symbol, period)
+                
+                if not data.empty:
+                    found_any_data = True
+                elif symbol == resolved_symbol:
+                    resolved_returned_nothing = True
                 
                 if not data.empty and len(data) > 5:  # Ensure we have meaningful data
+                    self.suffix_cache.set_resolved(base_symbol, symbol)
                     return data, symbol
                     
             except Exception as e:
+                had_error = True
                 continue
         
+        # Only remember symbols with no data at all, not ones that were just short on bars
+        # or that failed because of a network error
+        if not found_any_data and not had_error:
+            self.suffix_cache.set_unresolvable(base_symbol)
+        elif resolved_returned_nothing:
+            # The cached variation answered without data; an error (e.g. offline) keeps it
+            self.suffix_cache.forget(base_symbol)
+        
         return None, None
     
     def fetch_stock_data(self, symbol, period="6mo"):
@@ -55,8 +151,7 @@ class StockDataFetcher:
         try:
             # First try the symbol as provided
             if symbol.endswith('.NS') or symbol.endswith('.BO'):
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period)
+                data = self.store.get_history(symbol, period)
                 
                 if not data.empty and len(data) > 5:
                     return self._process_stock_data(data)
@@ -74,7 +169,9 @@ class StockDataFetcher:
                         # Filter to requested period
                         processed_data = self._process_stock_data(data)
                         if processed_data is not None:
-                            return processed_data.tail(self._get_period_days(period))
+                            sliced_data = slice_period(processed_data, period)
+                            if not sliced_data.empty:
+                                return sliced_data
                 
                 return None
                 
@@ -82,6 +179,35 @@ class StockDataFetcher:
             st.error(f"Error fetching data for {symbol}: {str(e)}")
             return None
     
+    def fetch_many(self, symbols, period="6mo"):
+        """
+        Fetch stock data for many symbols using batched multi-ticker downloads.
+        
+        Args:
+            symbols (list): Yahoo Finance symbols (with exchange suffix, e.g. TCS.NS)
+            period (str): Time period for data (1mo, 3mo, 6mo, 1y, 2y, 5y)
+        
+        Returns:
+            tuple: (dict of symbol -> processed DataFrame, dict of symbol -> error message).
+            A symbol that fails is reported in the second dict without affecting the others.
+        """
+        histories, failures = self.store.get_many(symbols, period)
+        
+        results = {}
+        for symbol, data in histories.items():
+            try:
+                processed_data = self._process_stock_data(data)
+            except Exception as e:
+                failures[symbol] = str(e)
+                continue
+            
+            if processed_data is None:
+                failures[symbol] = "No usable data"
+            else:
+                results[symbol] = processed_data
+        
+        return results, failures
+    
     def _process_stock_data(self, data):
         """
         Process and clean the stock data.
@@ -126,43 +252,35 @@ class StockDataFetcher:
         
         return data
     
-    def _get_period_days(self, period):
-        """Convert period string to approximate number of days for filtering."""
-        period_map = {
-            "1mo": 30,
-            "3mo": 90,
-            "6mo": 180,
-            "1y": 365,
-            "2y": 730,
-            "5y": 1825
-        }
-        return period_map.get(period, 180)
-    
     def get_stock_info(self, symbol):
         """
         Get additional stock information like company name, sector, etc.
         
+        Served from the local fundamentals snapshot; a missing or stale snapshot
+        is refreshed in the background, so this never waits on ticker.info.
+        
         Args:
             symbol (str): Stock symbol
             
         Returns:
-            dict: Stock information
+            dict: Stock information ('N/A' for fields not known yet)
         """
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            fundamentals = get_fundamentals_store()
+            fundamentals.refresh_in_background([symbol])
+            snapshot = fundamentals.get(symbol) or {}
             
             # Extract relevant information
             stock_info = {
                 'symbol': symbol,
-                'name': info.get('longName', 'N/A'),
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'market_cap': info.get('marketCap', 'N/A'),
-                'pe_ratio': info.get('trailingPE', 'N/A'),
-                'dividend_yield': info.get('dividendYield', 'N/A'),
-                'beta': info.get('beta', 'N/A'),
-                'currency': info.get('currency', 'INR')
+                'name': snapshot.get('name') or 'N/A',
+                'sector': snapshot.get('sector') or 'N/A',
+                'industry': snapshot.get('industry') or 'N/A',
+                'market_cap': snapshot.get('market_cap') or 'N/A',
+                'pe_ratio': snapshot.get('pe_ratio') or 'N/A',
+                'dividend_yield': snapshot.get('dividend_yield') or 'N/A',
+                'beta': snapshot.get('beta') or 'N/A',
+                'currency': snapshot.get('currency') or 'INR'
             }
             
             return stock_info
@@ -180,8 +298,20 @@ class StockDataFetcher:
         Returns:
             bool: True if valid, False otherwise
         """
+        base_symbol = symbol.upper().strip()
+        if base_symbol.endswith('.NS') or base_symbol.endswith('.BO'):
+            base_symbol = base_symbol[:-3]
+        
+        # Answer from the suffix cache when possible
+        if self.suffix_cache.get_resolved(base_symbol):
+            return True
+        if self.suffix_cache.is_unresolvable(base_symbol):
+            return False
+        
         try:
-            data, found_symbol = self._try_symbol_variations(symbol, "5d")
+            # History comes from the local store, so a month costs the same as 5 days
+            # and gives enough bars for the meaningful-data check
+            data, found_symbol = self._try_symbol_variations(symbol, "1mo")
             return data is not None and not data.empty
         except Exception:
             return False
@@ -207,11 +337,12 @@ class StockDataFetcher:
         }
         
         try:
+            histories, failures = _self.fetch_many(popular_stocks, period="2d")
+            
             for symbol in popular_stocks:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period="2d")
+                data = histories.get(symbol)
                 
-                if len(data) >= 2:
+                if data is not None and len(data) >= 2:
                     current = data['Close'].iloc[-1]
                     previous = data['Close'].iloc[-2]
                     change_pct = ((current - previous) / previous) * 100
@@ -1,104 +1,143 @@
 """
 Stock database for autocomplete functionality
-Contains popular Indian stocks from NSE and BSE
+Serves Indian stocks (the NSE 500 and a few extra listings) from the security master
 """
 
-# Comprehensive list of popular Indian stocks
-INDIAN_STOCKS = {
-    # Banking & Financial Services
-    "HDFCBANK": {"name": "HDFC Bank Limited", "symbol": "HDFCBANK.NS", "sector": "Banking", "exchange": "NSE"},
-    "ICICIBANK": {"name": "ICICI Bank Limited", "symbol": "ICICIBANK.NS", "sector": "Banking", "exchange": "NSE"},
-    "SBIN": {"name": "State Bank of India", "symbol": "SBIN.NS", "sector": "Banking", "exchange": "NSE"},
-    "KOTAKBANK": {"name": "Kotak Mahindra Bank", "symbol": "KOTAKBANK.NS", "sector": "Banking", "exchange": "NSE"},
-    "AXISBANK": {"name": "Axis Bank Limited", "symbol": "AXISBANK.NS", "sector": "Banking", "exchange": "NSE"},
-    "INDUSIND": {"name": "IndusInd Bank Limited", "symbol": "INDUSINDBK.NS", "sector": "Banking", "exchange": "NSE"},
-    "BANDHANBNK": {"name": "Bandhan Bank Limited", "symbol": "BANDHANBNK.NS", "sector": "Banking", "exchange": "NSE"},
-    
-    # IT Services
-    "TCS": {"name": "Tata Consultancy Services", "symbol": "TCS.NS", "sector": "IT Services", "exchange": "NSE"},
-    "INFY": {"name": "Infosys Limited", "symbol": "INFY.NS", "sector": "IT Services", "exchange": "NSE"},
-    "WIPRO": {"name": "Wipro Limited", "symbol": "WIPRO.NS", "sector": "IT Services", "exchange": "NSE"},
-    "HCLTECH": {"name": "HCL Technologies", "symbol": "HCLTECH.NS", "sector": "IT Services", "exchange": "NSE"},
-    "TECHM": {"name": "Tech Mahindra Limited", "symbol": "TECHM.NS", "sector": "IT Services", "exchange": "NSE"},
-    "LTI": {"name": "L&T Infotech Limited", "symbol": "LTI.NS", "sector": "IT Services", "exchange": "NSE"},
-    
-    # Oil & Gas
-    "RELIANCE": {"name": "Reliance Industries", "symbol": "RELIANCE.NS", "sector": "Oil & Gas", "exchange": "NSE"},
-    "ONGC": {"name": "Oil & Natural Gas Corp", "symbol": "ONGC.NS", "sector": "Oil & Gas", "exchange": "NSE"},
-    "IOC": {"name": "Indian Oil Corporation", "symbol": "IOC.NS", "sector": "Oil & Gas", "exchange": "NSE"},
-    "BPCL": {"name": "Bharat Petroleum Corp", "symbol": "BPCL.NS", "sector": "Oil & Gas", "exchange": "NSE"},
-    "HPCL": {"name": "Hindustan Petroleum", "symbol": "HPCL.NS", "sector": "Oil & Gas", "exchange": "NSE"},
-    
-    # Automotive
-    "MARUTI": {"name": "Maruti Suzuki India", "symbol": "MARUTI.NS", "sector": "Automotive", "exchange": "NSE"},
-    "TATAMOTORS": {"name": "Tata Motors Limited", "symbol": "TATAMOTORS.NS", "sector": "Automotive", "exchange": "NSE"},
-    "M&M": {"name": "Mahindra & Mahindra", "symbol": "M&M.NS", "sector": "Automotive", "exchange": "NSE"},
-    "BAJAJ-AUTO": {"name": "Bajaj Auto Limited", "symbol": "BAJAJ-AUTO.NS", "sector": "Automotive", "exchange": "NSE"},
-    "HEROMOTOCO": {"name": "Hero MotoCorp Limited", "symbol": "HEROMOTOCO.NS", "sector": "Automotive", "exchange": "NSE"},
-    "EICHERMOT": {"name": "Eicher Motors Limited", "symbol": "EICHERMOT.NS", "sector": "Automotive", "exchange": "NSE"},
-    
-    # FMCG
-    "HINDUNILVR": {"name": "Hindustan Unilever", "symbol": "HINDUNILVR.NS", "sector": "FMCG", "exchange": "NSE"},
-    "ITC": {"name": "ITC Limited", "symbol": "ITC.NS", "sector": "FMCG", "exchange": "NSE"},
-    "NESTLEIND": {"name": "Nestle India Limited", "symbol": "NESTLEIND.NS", "sector": "FMCG", "exchange": "NSE"},
-    "BRITANNIA": {"name": "Britannia Industries", "symbol": "BRITANNIA.NS", "sector": "FMCG", "exchange": "NSE"},
-    "DABUR": {"name": "Dabur India Limited", "symbol": "DABUR.NS", "sector": "FMCG", "exchange": "NSE"},
-    "GODREJCP": {"name": "Godrej Consumer Products", "symbol": "GODREJCP.NS", "sector": "FMCG", "exchange": "NSE"},
-    
-    # Telecom
-    "BHARTIARTL": {"name": "Bharti Airtel Limited", "symbol": "BHARTIARTL.NS", "sector": "Telecom", "exchange": "NSE"},
-    "IDEA": {"name": "Vodafone Idea Limited", "symbol": "IDEA.NS", "sector": "Telecom", "exchange": "NSE"},
-    
-    # Pharmaceuticals
-    "SUNPHARMA": {"name": "Sun Pharmaceutical", "symbol": "SUNPHARMA.NS", "sector": "Pharma", "exchange": "NSE"},
-    "DRREDDY": {"name": "Dr. Reddy's Laboratories", "symbol": "DRREDDY.NS", "sector": "Pharma", "exchange": "NSE"},
-    "CIPLA": {"name": "Cipla Limited", "symbol": "CIPLA.NS", "sector": "Pharma", "exchange": "NSE"},
-    "DIVISLAB": {"name": "Divi's Laboratories", "symbol": "DIVISLAB.NS", "sector": "Pharma", "exchange": "NSE"},
-    "BIOCON": {"name": "Biocon Limited", "symbol": "BIOCON.NS", "sector": "Pharma", "exchange": "NSE"},
-    "LUPIN": {"name": "Lupin Limited", "symbol": "LUPIN.NS", "sector": "Pharma", "exchange": "NSE"},
-    
-    # Metals & Mining
-    "TATASTEEL": {"name": "Tata Steel Limited", "symbol": "TATASTEEL.NS", "sector": "Metals", "exchange": "NSE"},
-    "JSWSTEEL": {"name": "JSW Steel Limited", "symbol": "JSWSTEEL.NS", "sector": "Metals", "exchange": "NSE"},
-    "HINDALCO": {"name": "Hindalco Industries", "symbol": "HINDALCO.NS", "sector": "Metals", "exchange": "NSE"},
-    "VEDL": {"name": "Vedanta Limited", "symbol": "VEDL.NS", "sector": "Metals", "exchange": "NSE"},
-    "COALINDIA": {"name": "Coal India Limited", "symbol": "COALINDIA.NS", "sector": "Mining", "exchange": "NSE"},
-    "NATIONALUM": {"name": "National Aluminium", "symbol": "NATIONALUM.NS", "sector": "Metals", "exchange": "NSE"},
-    
-    # Cement
-    "ULTRACEMCO": {"name": "UltraTech Cement", "symbol": "ULTRACEMCO.NS", "sector": "Cement", "exchange": "NSE"},
-    "SHREECEM": {"name": "Shree Cement Limited", "symbol": "SHREECEM.NS", "sector": "Cement", "exchange": "NSE"},
-    "GRASIM": {"name": "Grasim Industries", "symbol": "GRASIM.NS", "sector": "Cement", "exchange": "NSE"},
-    "ACC": {"name": "ACC Limited", "symbol": "ACC.NS", "sector": "Cement", "exchange": "NSE"},
-    "AMBUJACEM": {"name": "Ambuja Cements", "symbol": "AMBUJACEM.NS", "sector": "Cement", "exchange": "NSE"},
-    
-    # Power
-    "POWERGRID": {"name": "Power Grid Corp of India", "symbol": "POWERGRID.NS", "sector": "Power", "exchange": "NSE"},
-    "NTPC": {"name": "NTPC Limited", "symbol": "NTPC.NS", "sector": "Power", "exchange": "NSE"},
-    "TATAPOWER": {"name": "Tata Power Company", "symbol": "TATAPOWER.NS", "sector": "Power", "exchange": "NSE"},
-    "ADANIPOWER": {"name": "Adani Power Limited", "symbol": "ADANIPOWER.NS", "sector": "Power", "exchange": "NSE"},
-    
-    # Infrastructure
-    "LT": {"name": "Larsen & Toubro", "symbol": "LT.NS", "sector": "Infrastructure", "exchange": "NSE"},
-    "ADANIPORTS": {"name": "Adani Ports & SEZ", "symbol": "ADANIPORTS.NS", "sector": "Infrastructure", "exchange": "NSE"},
-    
-    # Airlines
-    "INDIGO": {"name": "InterGlobe Aviation", "symbol": "INDIGO.NS", "sector": "Airlines", "exchange": "NSE"},
-    "SPICEJET": {"name": "SpiceJet Limited", "symbol": "SPICEJET.NS", "sector": "Airlines", "exchange": "NSE"},
-    
-    # Retail
-    "DMART": {"name": "Avenue Supermarts", "symbol": "DMART.NS", "sector": "Retail", "exchange": "NSE"},
-    "TRENT": {"name": "Trent Limited", "symbol": "TRENT.NS", "sector": "Retail", "exchange": "NSE"},
-    
-    # Real Estate
-    "DLF": {"name": "DLF Limited", "symbol": "DLF.NS", "sector": "Real Estate", "exchange": "NSE"},
-    "GODREJPROP": {"name": "Godrej Properties", "symbol": "GODREJPROP.NS", "sector": "Real Estate", "exchange": "NSE"},
-    
-    # Insurance
-    "SBILIFE": {"name": "SBI Life Insurance", "symbol": "SBILIFE.NS", "sector": "Insurance", "exchange": "NSE"},
-    "ICICIPRULI": {"name": "ICICI Prudential Life", "symbol": "ICICIPRULI.NS", "sector": "Insurance", "exchange": "NSE"},
-    "HDFCLIFE": {"name": "HDFC Life Insurance", "symbol": "HDFCLIFE.NS", "sector": "Insurance", "exchange": "NSE"},
-}
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+from utils.security_master import get_security_master
+from utils.shared import process_singleton
+
+# Share of the query's trigrams a stock must contain to be offered as a fuzzy match
+FUZZY_MIN_SIMILARITY = 0.5
+
+# Distinct queries whose results are memoized (one per keystroke typed in the sidebar)
+SEARCH_CACHE_SIZE = 2048
+
+def _trigrams(text):
+    """Character trigrams of each word, padded like "  word " so word starts weigh more"""
+    grams = set()
+    for word in re.findall(r"[a-z0-9&]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _stock_entry(record):
+    """Stock dict used by the sidebar (symbol, full_symbol, name, sector, exchange)"""
+    return {
+        "symbol": record["symbol"],
+        "full_symbol": record["yahoo_symbol"],
+        "name": record["name"],
+        "sector": record["sector"],
+        "exchange": record["exchange"]
+    }
+
+class StockSearchIndex:
+    """Prebuilt autocomplete index over the security master.
+    
+    Symbol prefixes are found by bisecting the sorted lowercase symbols.
+    Substring matches use sorted suffix arrays of the lowercase names and
+    symbols: every suffix of every name, so a query matches a name exactly
+    when it is a prefix of one of its suffixes. Word tokens of a name are the
+    suffixes that start at a word boundary, so mid-word matches ("ank" in
+    "Bank") keep working. Each lookup is a few bisects plus a sort of the
+    matching row ids (listing order).
+    
+    Typos are handled by a character-trigram inverted index over symbol and
+    name words: a stock's similarity is the share of the query's trigrams it
+    contains, counted with one bincount over the query's posting lists.
+    """
+    
+    def __init__(self, master):
+        self.master = master
+        symbols = [symbol.lower() for symbol in master.symbols]
+        names = [name.lower() for name in master.names]
+        
+        self._symbol_keys, self._symbol_rows = self._sorted_keys((s, i) for i, s in enumerate(symbols))
+        self._name_keys, self._name_rows = self._sorted_keys((n, i) for i, n in enumerate(names))
+        self._name_suffixes, self._name_suffix_rows = self._sorted_keys(
+            (name[start:], i) for i, name in enumerate(names) for start in range(len(name))
+        )
+        self._symbol_suffixes, self._symbol_suffix_rows = self._sorted_keys(
+            (symbol[start:], i) for i, symbol in enumerate(symbols) for start in range(len(symbol))
+        )
+        
+        # Trigram -> rows containing it, and the trigram count of each row
+        postings = {}
+        self._trigram_counts = np.zeros(len(names), dtype=np.int32)
+        for i, (symbol, name) in enumerate(zip(symbols, names)):
+            grams = _trigrams(f"{symbol} {name}")
+            self._trigram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(rows, dtype=np.intp) for gram, rows in postings.items()}
+    
+    @staticmethod
+    def _sorted_keys(pairs):
+        pairs = sorted(pairs)
+        return [key for key, _ in pairs], np.array([row for _, row in pairs], dtype=np.intp)
+    
+    @staticmethod
+    def _prefix_rows(keys, rows, prefix):
+        """Sorted unique rows whose key starts with prefix"""
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\U0010ffff", lo)
+        return np.unique(rows[lo:hi])
+    
+    def fuzzy_rows(self, query, min_similarity=FUZZY_MIN_SIMILARITY):
+        """Rows similar to the query, most similar first"""
+        grams = _trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.intp)
+        
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._trigram_counts))
+        coverage = shared / len(grams)
+        rows = np.flatnonzero(coverage >= min_similarity)
+        
+        # Best coverage first; among equals prefer the closest length (Dice), then listing order
+        dice = 2 * shared[rows] / (len(grams) + self._trigram_counts[rows])
+        return rows[np.lexsort((rows, -dice, -coverage[rows]))]
+    
+    @lru_cache(maxsize=SEARCH_CACHE_SIZE)
+    def search(self, query, limit=10):
+        """
+        Ranked matches as a tuple of (row, match_type) pairs, best first:
+        symbol prefix, name prefix, name substring, symbol substring (each
+        tier in listing order, the order search_stocks has always used), then
+        fuzzy matches by similarity. Memoized per query.
+        """
+        symbol_prefix = self._prefix_rows(self._symbol_keys, self._symbol_rows, query)
+        ranked = [(row, "symbol_exact") for row in symbol_prefix[:limit]]
+        if len(ranked) >= limit:
+            return tuple(ranked)
+        
+        in_name = self._prefix_rows(self._name_suffixes, self._name_suffix_rows, query)
+        in_name = in_name[~np.isin(in_name, symbol_prefix)]
+        name_prefix = np.isin(in_name, self._prefix_rows(self._name_keys, self._name_rows, query))
+        ranked += [(row, "name") for row in in_name[name_prefix]]
+        ranked += [(row, "name") for row in in_name[~name_prefix]]
+        if len(ranked) >= limit:
+            return tuple(ranked[:limit])
+        
+        in_symbol = self._prefix_rows(self._symbol_suffixes, self._symbol_suffix_rows, query)
+        in_symbol = in_symbol[~np.isin(in_symbol, symbol_prefix) & ~np.isin(in_symbol, in_name)]
+        ranked += [(row, "symbol_partial") for row in in_symbol]
+        if len(ranked) >= limit:
+            return tuple(ranked[:limit])
+        
+        matched = {row for row, _ in ranked}
+        ranked += [(row, "fuzzy") for row in self.fuzzy_rows(query) if row not in matched]
+        return tuple(ranked[:limit])
+
+@process_singleton
+def get_search_index():
+    """Get the process-wide search index, building it on first use"""
+    return StockSearchIndex(get_security_master())
 
 def search_stocks(query, limit=10):
     """
@@ -115,58 +154,11 @@ def search_stocks(query, limit=10):
     if not query:
         return []
     
-    matches = []
-    
-    # Search by symbol first (exact and partial matches)
-    for symbol, data in INDIAN_STOCKS.items():
-        if symbol.lower().startswith(query):
-            matches.append({
-                "symbol": symbol,
-                "full_symbol": data["symbol"],
-                "name": data["name"],
-                "sector": data["sector"],
-                "exchange": data["exchange"],
-                "match_type": "symbol_exact"
-            })
-    
-    # Search by company name
-    for symbol, data in INDIAN_STOCKS.items():
-        name_lower = data["name"].lower()
-        if query in name_lower and not any(m["symbol"] == symbol for m in matches):
-            matches.append({
-                "symbol": symbol,
-                "full_symbol": data["symbol"],
-                "name": data["name"],
-                "sector": data["sector"],
-                "exchange": data["exchange"],
-                "match_type": "name"
-            })
-    
-    # Search by partial symbol match (if not already found)
-    for symbol, data in INDIAN_STOCKS.items():
-        if query in symbol.lower() and not any(m["symbol"] == symbol for m in matches):
-            matches.append({
-                "symbol": symbol,
-                "full_symbol": data["symbol"],
-                "name": data["name"],
-                "sector": data["sector"],
-                "exchange": data["exchange"],
-                "match_type": "symbol_partial"
-            })
-    
-    # Sort matches by relevance
-    def sort_key(match):
-        if match["match_type"] == "symbol_exact":
-            return 0
-        elif match["match_type"] == "name" and match["name"].lower().startswith(query):
-            return 1
-        elif match["match_type"] == "name":
-            return 2
-        else:
-            return 3
-    
-    matches.sort(key=sort_key)
-    return matches[:limit]
+    index = get_search_index()
+    return [
+        dict(_stock_entry(index.master.record(row)), match_type=match_type)
+        for row, match_type in index.search(query, limit)
+    ]
 
 def get_popular_stocks(limit=12):
     """
@@ -183,20 +175,45 @@ def get_popular_stocks(limit=12):
         "BHARTIARTL", "ITC", "KOTAKBANK", "HINDUNILVR", "MARUTI", "SUNPHARMA"
     ]
     
+    master = get_security_master()
     popular_stocks = []
     for symbol in popular_symbols[:limit]:
-        if symbol in INDIAN_STOCKS:
-            data = INDIAN_STOCKS[symbol]
-            popular_stocks.append({
-                "symbol": symbol,
-                "full_symbol": data["symbol"],
-                "name": data["name"],
-                "sector": data["sector"],
-                "exchange": data["exchange"]
-            })
+        data = master.get(symbol)
+        if data is not None:
+            popular_stocks.append(_stock_entry(data))
     
     return popular_stocks
 
+class SectorIndex:
+    """Sector -> member stocks, computed once from the security master.
+    
+    Shared by the sidebar's sector browser and the market report's sector
+    filter; lookups are case-insensitive dict hits.
+    """
+    
+    def __init__(self, master):
+        # The security master keeps its sector names sorted
+        self.sectors = tuple(master.sector_names)
+        self._members = {}
+        self._symbols = {}
+        for sector in self.sectors:
+            entries = tuple(_stock_entry(record) for record in master.records(master.sector_rows(sector)))
+            self._members[sector.lower()] = entries
+            self._symbols[sector.lower()] = frozenset(entry["symbol"] for entry in entries)
+    
+    def members(self, sector):
+        """Stock entries of a sector in listing order (empty if unknown)"""
+        return self._members.get(sector.lower(), ())
+    
+    def symbols(self, sector):
+        """Exchange symbols of a sector (empty if unknown)"""
+        return self._symbols.get(sector.lower(), frozenset())
+
+@process_singleton
+def get_sector_index():
+    """Get the process-wide sector index, building it on first use"""
+    return SectorIndex(get_security_master())
+
 def get_stocks_by_sector(sector):
     """
     Get stocks filtered by sector
@@ -207,18 +224,7 @@ def get_stocks_by_sector(sector):
     Returns:
         list: List of stocks in the sector
     """
-    stocks = []
-    for symbol, data in INDIAN_STOCKS.items():
-        if data["sector"].lower() == sector.lower():
-            stocks.append({
-                "symbol": symbol,
-                "full_symbol": data["symbol"],
-                "name": data["name"],
-                "sector": data["sector"],
-                "exchange": data["exchange"]
-            })
-    
-    return stocks
+    return [dict(entry) for entry in get_sector_index().members(sector)]
 
 def get_all_sectors():
     """
@@ -227,8 +233,4 @@ def get_all_sectors():
     Returns:
         list: List of unique sectors
     """
-    sectors = set()
-    for data in INDIAN_STOCKS.values():
-        sectors.add(data["sector"])
-    
-    return sorted(list(sectors))
\ No newline at end of file
+    return list(get_sector_index().sectors)
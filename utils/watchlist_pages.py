@@ -11,10 +11,25 @@ from plotly.subplots import make_subplots
 from utils.stock_data import StockDataFetcher
 from utils.chart_utils import create_price_chart, create_volume_chart
 from utils.excel_analyzer import ExcelAnalyzer
-from utils.live_data_fetcher import LiveDataFetcher, refresh_live_data
+from utils.live_data_fetcher import get_live_data_fetcher, refresh_live_data
+from utils.quote_engine import get_quote_poller
 import numpy as np
 from datetime import datetime, timedelta
 
+# Seconds between re-renders of the live sections while auto-refresh is on
+LIVE_REFRESH_SECONDS = 60
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def render_live(render, df: pd.DataFrame, *args):
+    """Call render(df, *args) with fresh live quote columns, re-rendered on a timer without rerunning the page"""
+    symbols = df['Identified_Symbol'].dropna().unique().tolist()
+    
+    # The poller keeps these quotes fresh in the shared cache, so a tick is a memory read
+    get_quote_poller().watch(symbols)
+    quotes = get_live_data_fetcher().live_quote_columns(symbols)
+    df = df.drop(columns=list(quotes.columns), errors='ignore').join(quotes, on='Identified_Symbol')
+    render(df, *args)
+
 class WatchlistPages:
     """Creates dynamic pages based on Excel watchlist data"""
     
@@ -23,7 +38,7 @@ class WatchlistPages:
         self.analyzer = ExcelAnalyzer(excel_file_path)
         self.analysis = self.analyzer.analyze_file()
         self.stock_fetcher = st.session_state.get('stock_fetcher')
-        self.live_fetcher = LiveDataFetcher()
+        self.live_fetcher = get_live_data_fetcher()
         
     def render_watchlist_overview(self):
         """Render overview page showing all available watchlists"""
@@ -110,9 +125,7 @@ class WatchlistPages:
                     st.rerun()
         
         with col2:
-            auto_refresh = st.checkbox("Auto-refresh (5min)", key=f"auto_refresh_{sheet_name}")
-            if auto_refresh:
-                st.empty()  # Placeholder for auto-refresh logic
+            auto_refresh = st.checkbox(f"Auto-refresh ({LIVE_REFRESH_SECONDS // 60}min)", key=f"auto_refresh_{sheet_name}")
         
         with col3:
             st.markdown("📊 **Live market data integration enabled**")
@@ -128,7 +141,37 @@ class WatchlistPages:
                 del st.session_state.selected_watchlist
             st.rerun()
         
+        # Live metrics and the data table re-render on their own timer; the rest of the page only on interaction
+        live = auto_refresh and 'Identified_Symbol' in df.columns
+        
         # Enhanced statistics with live data
+        if live:
+            render_live(self._render_live_metrics, df)
+        else:
+            self._render_live_metrics(df)
+        
+        st.markdown("---")
+        
+        # Analysis tabs
+        tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Table", "📈 Performance Analysis", "🎯 Stock Screening", "📋 Quick Analysis"])
+        
+        with tab1:
+            if live:
+                render_live(self._render_data_table, df, sheet_name)
+            else:
+                self._render_data_table(df, sheet_name)
+        
+        with tab2:
+            self._render_performance_analysis(df, sheet_name)
+        
+        with tab3:
+            self._render_stock_screening(df, sheet_name)
+        
+        with tab4:
+            self._render_quick_analysis(df, sheet_name)
+    
+    def _render_live_metrics(self, df: pd.DataFrame):
+        """Render summary metrics, using the live quote columns when present"""
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             identified_stocks = len(df[df['Stock_Name'].notna()]) if 'Stock_Name' in df.columns else 0
@@ -159,23 +202,6 @@ class WatchlistPages:
             if 'Last_Updated' in df.columns:
                 last_update = df['Last_Updated'].dropna().iloc[-1] if not df['Last_Updated'].dropna().empty else "Never"
                 st.metric("Last Updated", last_update)
-        
-        st.markdown("---")
-        
-        # Analysis tabs
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Table", "📈 Performance Analysis", "🎯 Stock Screening", "📋 Quick Analysis"])
-        
-        with tab1:
-            self._render_data_table(df, sheet_name)
-        
-        with tab2:
-            self._render_performance_analysis(df, sheet_name)
-        
-        with tab3:
-            self._render_stock_screening(df, sheet_name)
-        
-        with tab4:
-            self._render_quick_analysis(df, sheet_name)
     
     def _render_data_table(self, df: pd.DataFrame, sheet_name: str):
         """Render interactive data table with live data"""